@@ -178,33 +178,90 @@ class PriorityQueue:
     def  __init__(self):
         self.heap = []
         self.count = 0
+        self.entries = None # item -> its live heap entries, lowest priority first
+        self.size = 0       # number of live (not superseded) entries
 
     def push(self, item, priority):
-        entry = (priority, self.count, item)
+        entry = [priority, self.count, item, True]
         heapq.heappush(self.heap, entry)
         self.count += 1
+        self.size += 1
+        if self.entries is not None:
+            self._index(entry)
 
     def pop(self):
-        (_, _, item) = heapq.heappop(self.heap)
+        entry = heapq.heappop(self.heap)
+        while not entry[3]:
+            entry = heapq.heappop(self.heap)
+        self.size -= 1
+        item = entry[2]
+        if self.entries is not None:
+            try:
+                live = self.entries.get(item)
+            except TypeError:
+                live = None
+            if live:
+                # The popped entry is the lowest live one, so it heads its
+                # item's list; promote the next lowest remaining entry.
+                del live[0]
+                if live:
+                    best = live.index(min(live))
+                    live[0], live[best] = live[best], live[0]
+                else:
+                    del self.entries[item]
         return item
 
     def isEmpty(self):
-        return len(self.heap) == 0
+        return self.size == 0
 
     def update(self, item, priority):
-        # If item already in priority queue with higher priority, update its priority and rebuild the heap.
+        # If item already in priority queue with higher priority, update its priority.
         # If item already in priority queue with equal or lower priority, do nothing.
         # If item not in priority queue, do the same thing as self.push.
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
-                break
-        else:
+        # The old entry is looked up through self.entries and marked stale
+        # (pop skips it) instead of being removed, so this is O(log n).  The
+        # index is only built on the first update, so queues that are only
+        # pushed and popped never pay for hashing their items.  An item that
+        # was pushed more than once keeps all of its live entries indexed and
+        # update acts on the lowest of them (earliest pushed among equals).
+        if self.entries is None:
+            self.entries = {}
+            for entry in self.heap:
+                if entry[3]:
+                    self._index(entry)
+        try:
+            live = self.entries.get(item)
+            entry = live[0] if live else None
+        except TypeError:
+            live = None
+            entry = self._find(item)
+        if entry is None:
             self.push(item, priority)
+            return
+        if entry[0] <= priority:
+            return
+        entry[3] = False
+        newEntry = [priority, entry[1], item, True]
+        heapq.heappush(self.heap, newEntry)
+        if live is not None:
+            live[0] = newEntry
+
+    def _index(self, entry):
+        try:
+            live = self.entries.setdefault(entry[2], [])
+        except TypeError:
+            return # Unhashable items can be pushed, they just aren't indexed
+        live.append(entry)
+        if entry < live[0]:
+            live[0], live[-1] = live[-1], live[0]
+
+    def _find(self, item):
+        "Linear scan for the lowest-priority live entry holding an unhashable item"
+        best = None
+        for entry in self.heap:
+            if entry[3] and entry[2] == item and (best is None or entry < best):
+                best = entry
+        return best
 
 class PriorityQueueWithFunction(PriorityQueue):
     """
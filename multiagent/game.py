@@ -205,6 +205,8 @@ class Grid:
     def __eq__(self, other):
         if other == None:
             return False
+        if isinstance(other, BitGrid):
+            return other == self
         return self.data == other.data
 
     def __hash__(self):
@@ -299,6 +301,159 @@ def reconstituteGrid(bitRep):
     width, height = bitRep[:2]
     return Grid(width, height, bitRepresentation=bitRep[2:])
 
+
+# Python hashes a non-negative int n as n mod HASH_MODULUS, a Mersenne prime
+# 2**k - 1, so 2**i hashes to 2**(i % k).  BitGrid uses this to keep its hash
+# in step with its bits without rehashing the whole integer.
+HASH_MODULUS = sys.hash_info.modulus
+HASH_PERIOD = HASH_MODULUS.bit_length()
+
+
+class BitGrid:
+    """
+    A drop-in replacement for Grid whose cells are the bits of one Python
+    int: cell (x,y) is bit x * height + y, the same order Grid.asList and
+    Grid.__hash__ use, so a BitGrid equals and hashes like a Grid holding
+    the same cells.  Cells are still read and written via grid[x][y].
+
+    The number of True cells and the hash are updated on every write, so
+    count() and hash() are O(1).  asList() only visits set bits, and copy()
+    is O(1): the int is immutable, so copies share it until one of them is
+    written to.
+    """
+
+    def __init__(self, width, height, initialValue=False, bits=0):
+        if initialValue not in [False, True]:
+            raise Exception('Grids can only contain booleans')
+        self.width = width
+        self.height = height
+        if initialValue:
+            bits = (1 << (width * height)) - 1
+        self.bits = bits
+        self._count = bin(bits).count('1')
+        self._hash = bits % HASH_MODULUS
+        self._columns = None
+
+    def __getitem__(self, x):
+        if self._columns is None:
+            self._columns = [BitGridColumn(self, i) for i in range(self.width)]
+        return self._columns[x]
+
+    def __setitem__(self, x, column):
+        for y, value in enumerate(column):
+            self._set(x * self.height + y, value)
+
+    def _set(self, index, value):
+        mask = 1 << index
+        if value:
+            if not self.bits & mask:
+                self.bits |= mask
+                self._count += 1
+                self._hash = (self._hash + (1 << (index % HASH_PERIOD))) % HASH_MODULUS
+        elif self.bits & mask:
+            self.bits ^= mask
+            self._count -= 1
+            self._hash = (self._hash - (1 << (index % HASH_PERIOD))) % HASH_MODULUS
+
+    def __str__(self):
+        return str(self.toGrid())
+
+    def __eq__(self, other):
+        if isinstance(other, BitGrid):
+            return self.bits == other.bits and self.width == other.width and self.height == other.height
+        if isinstance(other, Grid):
+            return self == gridToBitGrid(other)
+        return False
+
+    def __hash__(self):
+        return self._hash
+
+    def copy(self):
+        g = BitGrid(self.width, self.height)
+        g.bits, g._count, g._hash = self.bits, self._count, self._hash
+        return g
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def count(self, item=True):
+        if item is True:
+            return self._count
+        if item is False:
+            return self.width * self.height - self._count
+        return 0
+
+    def asList(self, key=True):
+        bits = self.bits
+        if not key:
+            bits ^= (1 << (self.width * self.height)) - 1
+        list = []
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            list.append((index // self.height, index % self.height))
+            bits ^= low
+        return list
+
+    def packBits(self):
+        "Returns the same (width, height, bitPackedInts...) tuple as Grid.packBits"
+        return self.toGrid().packBits()
+
+    def toGrid(self):
+        "Returns a list-of-lists Grid with the same cells"
+        g = Grid(self.width, self.height)
+        for x, y in self.asList():
+            g.data[x][y] = True
+        return g
+
+
+class BitGridColumn:
+    "The column grid[x] of a BitGrid; reads and writes the grid's bits."
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.height = grid.height
+        self.offset = x * grid.height
+
+    def _index(self, y):
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError('BitGrid index out of range')
+        return self.offset + y
+
+    def __getitem__(self, y):
+        if 0 <= y < self.height:
+            return self.grid.bits >> (self.offset + y) & 1 == 1
+        return self.grid.bits >> self._index(y) & 1 == 1
+
+    def __setitem__(self, y, value):
+        self.grid._set(self._index(y), value)
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield self[y]
+
+
+def gridToBitGrid(grid):
+    "Returns a BitGrid with the same cells as a Grid"
+    if isinstance(grid, BitGrid):
+        return grid.copy()
+    bits = 0
+    index = 0
+    for column in grid.data:
+        for value in column:
+            if value:
+                bits |= 1 << index
+            index += 1
+    return BitGrid(grid.width, grid.height, bits=bits)
+
 ####################################
 # Parts you shouldn't have to read #
 ####################################
@@ -406,6 +561,11 @@ class GameStateData:
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+            self._hash = prevState._hash
+            self._agentHashes = None if prevState._agentHashes is None else prevState._agentHashes[:]
+        else:
+            self._hash = None
+            self._agentHashes = None
 
         self._foodEaten = None
         self._foodAdded = None
@@ -438,27 +598,52 @@ class GameStateData:
         if other == None:
             return False
         # TODO Check for type of other
-        if not self.agentStates == other.agentStates:
+        if not self.score == other.score:
             return False
-        if not self.food == other.food:
+        if not self.agentStates == other.agentStates:
             return False
         if not self.capsules == other.capsules:
             return False
-        if not self.score == other.score:
+        # Different cached hashes settle it without comparing the food
+        if self._hash is not None and other._hash is not None and self._hash != other._hash:
+            return False
+        if not self.food == other.food:
             return False
         return True
 
     def __hash__(self):
         """
         Allows states to be keys of dictionaries.
+
+        The hash is computed once, then kept in step by agentChanged,
+        foodChanged and capsuleChanged as the rules change the state, and
+        copied to successors, so it is O(1) after the first call.  Code that
+        changes an agent, a food dot or a capsule directly must call them.
         """
-        for i, state in enumerate(self.agentStates):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                # hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113 * hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575)
+        if self._hash is None:
+            self._agentHashes = [hash((index, agentState)) for index, agentState in enumerate(self.agentStates)]
+            capsules = sum(hash(capsule) for capsule in self.capsules)
+            self._hash = (sum(self._agentHashes) + 13 * hash(self.food) + 113 * capsules) % HASH_MODULUS
+        return (self._hash + 7 * hash(self.score)) % HASH_MODULUS
+
+    def agentChanged(self, index):
+        "Updates the cached hash after agent index's configuration or scared timer changed"
+        if self._hash is not None:
+            agentHash = hash((index, self.agentStates[index]))
+            self._hash = (self._hash + agentHash - self._agentHashes[index]) % HASH_MODULUS
+            self._agentHashes[index] = agentHash
+
+    def foodChanged(self, x, y):
+        "Updates the cached hash after food[x][y] changed; see BitGrid for the arithmetic"
+        if self._hash is not None:
+            foodHash = 13 * (1 << ((x * self.food.height + y) % HASH_PERIOD))
+            self._hash = (self._hash + (foodHash if self.food[x][y] else -foodHash)) % HASH_MODULUS
+
+    def capsuleChanged(self, position):
+        "Updates the cached hash after a capsule at position was added or removed"
+        if self._hash is not None:
+            capsuleHash = 113 * hash(position)
+            self._hash = (self._hash + (capsuleHash if position in self.capsules else -capsuleHash)) % HASH_MODULUS
 
     def __str__(self):
         width, height = self.layout.width, self.layout.height
@@ -519,6 +704,7 @@ class GameStateData:
         Creates an initial game state from a layout array (see layout.py).
         """
         self.food = layout.food.copy()
+        self._hash = None
         #self.capsules = []
         self.capsules = layout.capsules[:]
         self.layout = layout
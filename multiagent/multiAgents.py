@@ -14,10 +14,10 @@
 
 from util import manhattanDistance
 from game import Directions
-import random, util
+import random, util, time
 
 from game import Agent
-from pacman import GameState
+from pacman import GameState, MutableGameState
 
 class ReflexAgent(Agent):
     """
@@ -117,10 +117,161 @@ class MultiAgentSearchAgent(Agent):
     is another abstract class.
     """
 
-    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2'):
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', tableSize = '0', mutableState = 'False'):
         self.index = 0 # Pacman is always agent index 0
         self.evaluationFunction = util.lookup(evalFn, globals())
         self.depth = int(depth)
+        # -a tableSize=N shares a TranspositionTable of N entries between moves
+        self.table = TranspositionTable(int(tableSize)) if int(tableSize) > 0 else None
+        # -a mutableState=True searches one MutableGameState with doMove/undoMove
+        self.mutableState = str(mutableState).lower() in ['true', '1']
+
+    def searchState(self, gameState):
+        "The state to search from: gameState, or a MutableGameState copy of it"
+        return MutableGameState(gameState) if self.mutableState else gameState
+
+    def final(self, state):
+        if self.table is not None:
+            print('Transposition table: %s' % self.table.statsString())
+
+EXACT, LOWER, UPPER = 0, 1, 2 # Whether a stored value is exact or a bound
+
+class TranspositionTable:
+    """
+    A fixed size table of search values for game states, so a state reached
+    again by another order of moves is not searched twice.
+
+    States are identified by a Zobrist key: the XOR of a random 64 bit
+    number for each agent position and direction (ghosts may not turn
+    back), scared timer, remaining food dot and capsule.  stateKey(state)
+    builds it once per move; childKey updates it in O(number of agents)
+    for each successor.  Entries are looked up by (key, agent to move,
+    remaining plies, score), the score because two states with the same
+    board can still differ in ghosts eaten.
+
+    Each key has one slot (its hash modulo size).  A new entry replaces the
+    slot's old one unless that was stored during the current move with
+    more plies left to search.  Values are EXACT, or a LOWER or UPPER bound
+    when an alpha-beta search was cut off.  An entry may also keep the best
+    move found, for a later search of the state to try first.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.slots = [None] * size
+        self.generation = 0
+        self.random = random.Random(0)
+        self.zobrist = {}
+        self.hits = self.misses = self.stores = 0
+
+    def newSearch(self):
+        "Call once per move; entries from earlier moves are replaced first"
+        self.generation += 1
+
+    def _zobrist(self, item):
+        value = self.zobrist.get(item)
+        if value is None:
+            value = self.zobrist[item] = self.random.getrandbits(64)
+        return value
+
+    def stateKey(self, state):
+        key = 0
+        for index, (position, direction, scaredTimer) in enumerate(agentTuples(state)):
+            key ^= self._zobrist(('agent', index, position, direction))
+            key ^= self._zobrist(('scared', index, scaredTimer))
+        for position in state.getFood().asList():
+            key ^= self._zobrist(('food', position))
+        for position in state.getCapsules():
+            key ^= self._zobrist(('capsule', position))
+        return key
+
+    def childKey(self, key, parent, agentIndex, child):
+        """
+        The key of 'child', generated from 'parent' (with 'key') by agentIndex.
+        A MutableGameState is its own parent; its undo stack holds the rest.
+        """
+        if isinstance(child, MutableGameState):
+            positions, directions, scaredTimers, food, _, capsules = child.stack[-1][:6]
+            before = zip(positions, directions, scaredTimers)
+            ateFood, ateCapsule = food != child.food, len(capsules) != len(child.capsules)
+        else:
+            before = agentTuples(parent)
+            position = child.getPacmanPosition()
+            ateFood = agentIndex == 0 and parent.hasFood(*position)
+            ateCapsule = agentIndex == 0 and position in parent.getCapsules()
+        for index, (old, new) in enumerate(zip(before, agentTuples(child))):
+            if old[:2] != new[:2]:
+                key ^= self._zobrist(('agent', index) + old[:2])
+                key ^= self._zobrist(('agent', index) + new[:2])
+            if old[2] != new[2]:
+                key ^= self._zobrist(('scared', index, old[2]))
+                key ^= self._zobrist(('scared', index, new[2]))
+        if ateFood:
+            key ^= self._zobrist(('food', child.getPacmanPosition()))
+        if ateCapsule:
+            key ^= self._zobrist(('capsule', child.getPacmanPosition()))
+        return key
+
+    def lookup(self, key, state, agentIndex, remaining):
+        "Returns (value, flag) stored for this state and search, or None"
+        entryKey = (key, agentIndex, remaining, state.getScore())
+        entry = self.slots[hash(entryKey) % self.size]
+        if entry is not None and entry[0] == entryKey:
+            self.hits += 1
+            return entry[1], entry[2]
+        self.misses += 1
+        return None
+
+    def lookupMove(self, key, state, agentIndex, remaining):
+        "Returns the best move stored for this state and search, or None"
+        entryKey = (key, agentIndex, remaining, state.getScore())
+        entry = self.slots[hash(entryKey) % self.size]
+        if entry is not None and entry[0] == entryKey:
+            return entry[4]
+        return None
+
+    def store(self, key, state, agentIndex, remaining, value, flag, move=None):
+        entryKey = (key, agentIndex, remaining, state.getScore())
+        slot = hash(entryKey) % self.size
+        entry = self.slots[slot]
+        if entry is not None and entry[3] == self.generation and entry[0][2] > remaining:
+            return
+        self.slots[slot] = (entryKey, value, flag, self.generation, move)
+        self.stores += 1
+
+    def hitRate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def statsString(self):
+        return '%d hits, %d misses (%.1f%% hit rate), %d stores' % (
+            self.hits, self.misses, 100 * self.hitRate(), self.stores)
+
+def agentTuples(state):
+    "(position, direction, scaredTimer) for each agent in a GameState or MutableGameState"
+    if isinstance(state, MutableGameState):
+        return list(zip(state.positions, state.directions, state.scaredTimers))
+    return [(agentState.getPosition(), agentState.getDirection(), agentState.scaredTimer)
+            for agentState in state.data.agentStates]
+
+def successorKey(table, key, parent, agentIndex, child):
+    "The key of 'child' in 'table', or None when no table is in use"
+    return None if table is None else table.childKey(key, parent, agentIndex, child)
+
+def makeMove(gameState, agentIndex, action):
+    """
+    The successor of gameState after agentIndex takes the action.  A
+    MutableGameState is moved in place and returned; call unmakeMove on the
+    successor once done with it.
+    """
+    if isinstance(gameState, MutableGameState):
+        gameState.doMove(agentIndex, action)
+        return gameState
+    return gameState.generateSuccessor(agentIndex, action)
+
+def unmakeMove(successor):
+    "Takes back the move makeMove made, if it was made in place"
+    if isinstance(successor, MutableGameState):
+        successor.undoMove()
 
 class MinimaxAgent(MultiAgentSearchAgent):
     """
@@ -150,12 +301,20 @@ class MinimaxAgent(MultiAgentSearchAgent):
         gameState.isLose():
         Returns whether or not the game state is a losing state
         """
+        gameState = self.searchState(gameState)
         actions = gameState.getLegalActions(0)
         max = float('-inf')
         ans = Directions.STOP
+        key = None
+        if self.table is not None:
+            self.table.newSearch()
+            key = self.table.stateKey(gameState)
         for action in actions :
-            temp = minmax_search(gameState.generateSuccessor(0, action), 1 ,\
-                                    self.depth * gameState.getNumAgents(), self.evaluationFunction)
+            successor = makeMove(gameState, 0, action)
+            temp = minmax_search(successor, 1 ,\
+                                    self.depth * gameState.getNumAgents(), self.evaluationFunction,
+                                    self.table, successorKey(self.table, key, gameState, 0, successor))
+            unmakeMove(successor)
             if temp > max :
                 max = temp
                 ans = action
@@ -163,33 +322,72 @@ class MinimaxAgent(MultiAgentSearchAgent):
 
         # util.raiseNotDefined()
 
-def minmax_search(gameState, agentindex , depth, evaluationFunction):
+def minmax_search(gameState, agentindex , depth, evaluationFunction, table=None, key=None):
+    """
+    The minimax value of gameState with agentindex plies played out of
+    depth.  Given a TranspositionTable and gameState's key, values are
+    looked up and stored there.
+    """
     if gameState.isWin() or gameState.isLose() or agentindex >= depth : 
         return evaluationFunction(gameState)
-    if agentindex % gameState.getNumAgents() == 0 :
+    agent = agentindex % gameState.getNumAgents()
+    if table is not None:
+        entry = table.lookup(key, gameState, agent, depth - agentindex)
+        if entry is not None:
+            return entry[0]
+    if agent == 0 :
         actions = gameState.getLegalActions(0)
         max = float('-inf')
         for action in actions :
-            temp = minmax_search(gameState.generateSuccessor(agentindex % gameState.getNumAgents(), action), agentindex + 1 ,\
-                                    depth, evaluationFunction)
+            successor = makeMove(gameState, agent, action)
+            temp = minmax_search(successor, agentindex + 1 ,\
+                                    depth, evaluationFunction, table, successorKey(table, key, gameState, agent, successor))
+            unmakeMove(successor)
             if temp > max :
                 max = temp
-        return max
+        value = max
     else : 
-        actions = gameState.getLegalActions(agentindex % gameState.getNumAgents())
+        actions = gameState.getLegalActions(agent)
         min = float('inf')
         for action in actions :
-            temp = minmax_search(gameState.generateSuccessor(agentindex % gameState.getNumAgents(), action), agentindex + 1 ,\
-                                    depth, evaluationFunction)
+            successor = makeMove(gameState, agent, action)
+            temp = minmax_search(successor, agentindex + 1 ,\
+                                    depth, evaluationFunction, table, successorKey(table, key, gameState, agent, successor))
+            unmakeMove(successor)
             if temp < min :
                 min = temp
-        return min
+        value = min
+    if table is not None:
+        table.store(key, gameState, agent, depth - agentindex, value, EXACT)
+    return value
+
+class SearchTimeout(Exception):
+    "Raised inside an iterative deepening search when its time is up"
+    pass
 
 class AlphaBetaAgent(MultiAgentSearchAgent):
     """
     Your minimax agent with alpha-beta pruning (question 3)
+
+    With -a timeBudget=T (seconds) the agent ignores depth and deepens one
+    round of moves at a time, up to maxDepth, returning the best move of
+    the deepest search finished within T seconds.  Keep T below the game's
+    move timeout (ClassicGameRules.getMoveTimeout).  Moves are tried in the
+    order: the previous iteration's principal variation, then the best move
+    stored in the transposition table, then killer moves (the last two
+    moves that caused a cutoff at the same ply), then by the history
+    heuristic (how much search each agent's move has cut off).  With
+    -a tableSize=N the deepening search also settles nodes from the table's
+    stored values and bounds, and stores its own, so a state reached again
+    in this or a later iteration is not searched twice.
     """
 
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', tableSize = '0',
+                 timeBudget = '0', maxDepth = '20', mutableState = 'False'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, tableSize, mutableState)
+        self.timeBudget = float(timeBudget)
+        self.maxDepth = int(maxDepth)
+
     def getAction(self, gameState: GameState):
         """
         Returns the minimax action using self.depth and self.evaluationFunction
@@ -247,48 +445,165 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
     
     '''
     # autograder sucks !!!!!
+        gameState = self.searchState(gameState)
+        if self.timeBudget > 0:
+            return self.iterativeDeepeningAction(gameState)
         maxValue = float("-inf")
         alpha = float("-inf")
         beta = float("inf")
         maxAction = Directions.STOP
+        key = None
+        if self.table is not None:
+            self.table.newSearch()
+            key = self.table.stateKey(gameState)
         for action in gameState.getLegalActions(0):
-            nextState = gameState.generateSuccessor(0, action)
-            nextValue = self.getValue(nextState, 0, 1, alpha, beta)
+            nextState = makeMove(gameState, 0, action)
+            nextValue = self.getValue(nextState, 0, 1, alpha, beta, successorKey(self.table, key, gameState, 0, nextState))
+            unmakeMove(nextState)
             if nextValue > maxValue:
                 maxValue = nextValue
                 maxAction = action
             alpha = max(alpha, maxValue)
         return maxAction
 
-    def getValue(self, gameState, currentDepth, agentIndex, alpha, beta):
+    def getValue(self, gameState, currentDepth, agentIndex, alpha, beta, key=None):
         if currentDepth == self.depth or gameState.isWin() or gameState.isLose():
             return self.evaluationFunction(gameState)
-        elif agentIndex == 0:
-            return self.maxValue(gameState,currentDepth,alpha,beta)
-        else:
+        if self.table is None:
+            if agentIndex == 0:
+                return self.maxValue(gameState,currentDepth,alpha,beta)
             return self.minValue(gameState,currentDepth,agentIndex,alpha,beta)
 
-    def maxValue(self, gameState, currentDepth, alpha, beta):
+        # A stored bound can settle the value without searching
+        remaining = (self.depth - currentDepth) * gameState.getNumAgents() - agentIndex
+        entry = self.table.lookup(key, gameState, agentIndex, remaining)
+        if entry is not None:
+            value, flag = entry
+            if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                return value
+        if agentIndex == 0:
+            value = self.maxValue(gameState,currentDepth,alpha,beta,key)
+        else:
+            value = self.minValue(gameState,currentDepth,agentIndex,alpha,beta,key)
+        flag = UPPER if value <= alpha else LOWER if value >= beta else EXACT
+        self.table.store(key, gameState, agentIndex, remaining, value, flag)
+        return value
+
+    def maxValue(self, gameState, currentDepth, alpha, beta, key=None):
         maxValue = float("-inf")
         for action in gameState.getLegalActions(0):
-            maxValue = max(maxValue, self.getValue(gameState.generateSuccessor(0, action), currentDepth, 1, alpha, beta))
+            nextState = makeMove(gameState, 0, action)
+            maxValue = max(maxValue, self.getValue(nextState, currentDepth, 1, alpha, beta,
+                                                   successorKey(self.table, key, gameState, 0, nextState)))
+            unmakeMove(nextState)
             if maxValue > beta:
                 return maxValue
             alpha = max(alpha, maxValue)
         return maxValue
 
-    def minValue(self, gameState, currentDepth, agentIndex, alpha, beta):
+    def minValue(self, gameState, currentDepth, agentIndex, alpha, beta, key=None):
         minValue = float("inf")
         for action in gameState.getLegalActions(agentIndex):
+            nextState = makeMove(gameState, agentIndex, action)
+            nextKey = successorKey(self.table, key, gameState, agentIndex, nextState)
             if agentIndex == gameState.getNumAgents()-1:
-                minValue = min(minValue, self.getValue(gameState.generateSuccessor(agentIndex, action), currentDepth+1, 0, alpha, beta))
+                minValue = min(minValue, self.getValue(nextState, currentDepth+1, 0, alpha, beta, nextKey))
             else:
-                minValue = min(minValue, self.getValue(gameState.generateSuccessor(agentIndex, action), currentDepth, agentIndex+1, alpha, beta))
+                minValue = min(minValue, self.getValue(nextState, currentDepth, agentIndex+1, alpha, beta, nextKey))
+            unmakeMove(nextState)
             if minValue < alpha:
                 return minValue
             beta = min(beta, minValue)
         return minValue
 
+    def iterativeDeepeningAction(self, gameState):
+        "The best move of the deepest search that finishes within self.timeBudget"
+        self.deadline = time.perf_counter() + self.timeBudget
+        self.killers = {}   # ply -> up to two moves that caused a cutoff there
+        self.history = {}   # (agent, move) -> cutoff score
+        bestAction = gameState.getLegalActions(0)[0]
+        principal = []
+        self.completedDepth = 0
+        key = None
+        if self.table is not None:
+            self.table.newSearch()
+            key = self.table.stateKey(gameState)
+        for depth in range(1, self.maxDepth + 1):
+            try:
+                value, line = self.orderedValue(gameState, depth * gameState.getNumAgents(), 0,
+                                                float("-inf"), float("inf"), 0, principal, key)
+            except SearchTimeout:
+                break
+            if line:
+                bestAction, principal = line[0], line
+            self.completedDepth = depth
+            if value in (float("inf"), float("-inf")):
+                break # A forced win or loss; searching deeper will not change it
+        return bestAction
+
+    def orderMoves(self, actions, agentIndex, ply, pvMove, tableMove=None):
+        killers = self.killers.get(ply, [])
+        def rank(action):
+            if action == pvMove: return (0, 0)
+            if action == tableMove: return (1, 0)
+            if action in killers: return (2, killers.index(action))
+            return (3, -self.history.get((agentIndex, action), 0))
+        return sorted(actions, key=rank)
+
+    def orderedValue(self, gameState, plies, agentIndex, alpha, beta, ply, principal, key=None):
+        """
+        Returns (value, line) for gameState with 'plies' moves left to search,
+        where line is the principal variation found.  'principal' is the
+        previous iteration's line while this node is still on it, else [].
+        'key' is gameState's key in self.table, if there is one.  A value
+        settled by the table comes with an empty line, so this is never done
+        at the root, whose line gives the move.
+        """
+        if time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        if plies == 0 or gameState.isWin() or gameState.isLose():
+            return self.evaluationFunction(gameState), []
+        numAgents = gameState.getNumAgents()
+        tableMove = None
+        if self.table is not None:
+            if ply > 0:
+                entry = self.table.lookup(key, gameState, agentIndex, plies)
+                if entry is not None:
+                    value, flag = entry
+                    if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                        return value, []
+            # The move stored by this search, or else by the previous iteration
+            tableMove = self.table.lookupMove(key, gameState, agentIndex, plies) or \
+                self.table.lookupMove(key, gameState, agentIndex, plies - numAgents)
+        alphaBefore, betaBefore = alpha, beta
+        pvMove = principal[ply] if ply < len(principal) else None
+        actions = self.orderMoves(gameState.getLegalActions(agentIndex), agentIndex, ply, pvMove, tableMove)
+        maximizing = agentIndex == 0
+        best, bestLine = (float("-inf") if maximizing else float("inf")), []
+        for action in actions:
+            successor = makeMove(gameState, agentIndex, action)
+            value, line = self.orderedValue(successor, plies - 1, (agentIndex + 1) % numAgents, alpha, beta,
+                                            ply + 1, principal if action == pvMove else [],
+                                            successorKey(self.table, key, gameState, agentIndex, successor))
+            unmakeMove(successor)
+            if (value > best) if maximizing else (value < best):
+                best, bestLine = value, [action] + line
+            if maximizing:
+                alpha = max(alpha, best)
+            else:
+                beta = min(beta, best)
+            if alpha >= beta:
+                killers = self.killers.setdefault(ply, [])
+                if action not in killers:
+                    killers.insert(0, action)
+                    del killers[2:]
+                self.history[(agentIndex, action)] = self.history.get((agentIndex, action), 0) + plies * plies
+                break
+        if self.table is not None:
+            flag = UPPER if best <= alphaBefore else LOWER if best >= betaBefore else EXACT
+            self.table.store(key, gameState, agentIndex, plies, best, flag, bestLine[0] if bestLine else None)
+        return best, bestLine
+
 class ExpectimaxAgent(MultiAgentSearchAgent):
     """
       Your expectimax agent (question 4)
@@ -301,43 +616,64 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         All ghosts should be modeled as choosing uniformly at random from their
         legal moves.
         """
+        gameState = self.searchState(gameState)
         actions = gameState.getLegalActions(0)
         max = float('-inf')
         ans = Directions.STOP
+        key = None
+        if self.table is not None:
+            self.table.newSearch()
+            key = self.table.stateKey(gameState)
         for action in actions :
-            temp = self.getValue(gameState.generateSuccessor(0, action), 1 ,\
-                                    self.depth * gameState.getNumAgents(), self.evaluationFunction)
+            successor = makeMove(gameState, 0, action)
+            temp = self.getValue(successor, 1 ,\
+                                    self.depth * gameState.getNumAgents(), self.evaluationFunction,
+                                    successorKey(self.table, key, gameState, 0, successor))
+            unmakeMove(successor)
             if temp > max :
                 max = temp
                 ans = action
         return ans
         # util.raiseNotDefined()
 
-    def getValue(self, gameState, agentindex , depth, evaluationFunction):
+    def getValue(self, gameState, agentindex , depth, evaluationFunction, key=None):
         if gameState.isWin() or gameState.isLose() or agentindex >= depth : 
             return evaluationFunction(gameState)
-        if agentindex % gameState.getNumAgents() == 0 :
-            return self.max_node(gameState, agentindex , depth, evaluationFunction)
+        agent = agentindex % gameState.getNumAgents()
+        if self.table is not None:
+            entry = self.table.lookup(key, gameState, agent, depth - agentindex)
+            if entry is not None:
+                return entry[0]
+        if agent == 0 :
+            value = self.max_node(gameState, agentindex , depth, evaluationFunction, key)
         else : 
-            return self.stoch_node(gameState, agentindex , depth, evaluationFunction)
+            value = self.stoch_node(gameState, agentindex , depth, evaluationFunction, key)
+        if self.table is not None:
+            self.table.store(key, gameState, agent, depth - agentindex, value, EXACT)
+        return value
     
-    def max_node(self, gameState, agentindex , depth, evaluationFunction):
+    def max_node(self, gameState, agentindex , depth, evaluationFunction, key=None):
         actions = gameState.getLegalActions(0)
         max = float('-inf')
         for action in actions :
-            temp = self.getValue(gameState.generateSuccessor(agentindex % gameState.getNumAgents(), action), agentindex + 1 ,\
-                                    depth, evaluationFunction)
+            successor = makeMove(gameState, agentindex % gameState.getNumAgents(), action)
+            temp = self.getValue(successor, agentindex + 1 ,\
+                                    depth, evaluationFunction, successorKey(self.table, key, gameState, 0, successor))
+            unmakeMove(successor)
             if temp > max :
                 max = temp
         return max
 
-    def stoch_node(self, gameState, agentindex , depth, evaluationFunction):
-        actions = gameState.getLegalActions(agentindex % gameState.getNumAgents())
+    def stoch_node(self, gameState, agentindex , depth, evaluationFunction, key=None):
+        agent = agentindex % gameState.getNumAgents()
+        actions = gameState.getLegalActions(agent)
         ans = 0
         i = 0
         for action in actions :
-            ans += self.getValue(gameState.generateSuccessor(agentindex % gameState.getNumAgents(), action), agentindex + 1 ,\
-                                    depth, evaluationFunction)
+            successor = makeMove(gameState, agent, action)
+            ans += self.getValue(successor, agentindex + 1 ,\
+                                    depth, evaluationFunction, successorKey(self.table, key, gameState, agent, successor))
+            unmakeMove(successor)
             i += 1
         return ans/i
         
@@ -43,6 +43,10 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import AgentState
+from game import BitGrid
+from game import Configuration
+from game import gridToBitGrid
 from util import nearestPoint
 from util import manhattanDistance
 import util
@@ -52,6 +56,7 @@ import types
 import time
 import random
 import os
+import contextlib
 
 ###################################################
 # YOUR INTERFACE TO THE PACMAN WORLD: A GameState #
@@ -77,8 +82,10 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
+    # static variables: while trackExplored is on (see recordExplored), explored
+    # keeps every state that generateSuccessor has been called on or returned
     explored = set()
+    trackExplored = False
 
     def getAndResetExplored():
         tmp = GameState.explored.copy()
@@ -122,6 +129,7 @@ class GameState:
             state.data.scoreChange += -TIME_PENALTY  # Penalty for waiting around
         else:
             GhostRules.decrementTimer(state.data.agentStates[agentIndex])
+            state.data.agentChanged(agentIndex)
 
         # Resolve multi-agent effects
         GhostRules.checkDeath(state, agentIndex)
@@ -129,8 +137,9 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.trackExplored:
+            GameState.explored.add(self)
+            GameState.explored.add(state)
         return state
 
     def getLegalPacmanActions(self):
@@ -262,6 +271,216 @@ class GameState:
         """
         self.data.initialize(layout, numGhostAgents)
 
+
+@contextlib.contextmanager
+def recordExplored():
+    """
+    Records the states generateSuccessor sees in GameState.explored within
+    a with block, for GameState.getAndResetExplored to count.  Recording is
+    off otherwise, so long runs do not keep every state they generate.
+    """
+    previous = GameState.trackExplored
+    GameState.trackExplored = True
+    try:
+        yield
+    finally:
+        GameState.trackExplored = previous
+        if not previous:
+            GameState.explored = set()
+
+
+class MutableGameState:
+    """
+    A copy of a GameState for tree search that is changed in place:
+    doMove(agentIndex, action) applies a move under the same rules as
+    GameState.generateSuccessor and undoMove() takes back the last one, so
+    a search walks down and back up one state instead of copying a new
+    GameState for every successor.
+
+    Agent positions, directions and scared timers are tuples, the food is
+    an int with bit x * height + y set for a dot at (x,y) (the BitGrid
+    order) and the capsules are a tuple, so each move pushes references to
+    the old values onto an undo stack and undoMove just restores them.  The
+    score and the number of dots left are kept up to date on every move.
+
+    The accessors match GameState's, so evaluation functions written for a
+    GameState can score a MutableGameState too.  getGhostStates and
+    getFood build new objects on every call.  Moves are not checked for
+    legality; pass actions from getLegalActions.  Searches through a
+    MutableGameState do not add states to GameState.explored.
+    """
+
+    def __init__(self, gameState):
+        data = gameState.data
+        self.walls = data.layout.walls
+        self.height = self.walls.height
+        self.starts = [agentState.start for agentState in data.agentStates]
+        self.positions = tuple(agentState.getPosition() for agentState in data.agentStates)
+        self.directions = tuple(agentState.getDirection() for agentState in data.agentStates)
+        self.scaredTimers = tuple(agentState.scaredTimer for agentState in data.agentStates)
+        self.food = gridToBitGrid(data.food).bits
+        self.numFood = data.food.count()
+        self.capsules = tuple(data.capsules)
+        self.score = data.score
+        self._win = data._win
+        self._lose = data._lose
+        # (positions, directions, scaredTimers, food, numFood, capsules, score, win, lose) before each move
+        self.stack = []
+
+    def getLegalActions(self, agentIndex=0):
+        if self._win or self._lose:
+            return []
+        direction = self.directions[agentIndex]
+        possibleActions = Actions.getPossibleActions(
+            Configuration(self.positions[agentIndex], direction), self.walls)
+        if agentIndex == 0:
+            return possibleActions
+        # The ghosts' rules, as in GhostRules.getLegalActions
+        reverse = Actions.reverseDirection(direction)
+        if Directions.STOP in possibleActions:
+            possibleActions.remove(Directions.STOP)
+        if reverse in possibleActions and len(possibleActions) > 1:
+            possibleActions.remove(reverse)
+        return possibleActions
+
+    def getLegalPacmanActions(self):
+        return self.getLegalActions(0)
+
+    def doMove(self, agentIndex, action):
+        """
+        Makes agentIndex take the action, changing this state into its
+        successor.
+        """
+        if self._win or self._lose:
+            raise Exception('Can\'t generate a successor of a terminal state.')
+        self.stack.append((self.positions, self.directions, self.scaredTimers, self.food,
+                           self.numFood, self.capsules, self.score, self._win, self._lose))
+        positions = list(self.positions)
+        directions = list(self.directions)
+        scaredTimers = list(self.scaredTimers)
+        scoreChange = 0
+
+        # Move
+        if agentIndex == 0:
+            speed = PacmanRules.PACMAN_SPEED
+        else:
+            speed = GhostRules.GHOST_SPEED
+            if scaredTimers[agentIndex] > 0:
+                speed /= 2.0
+        x, y = positions[agentIndex]
+        dx, dy = Actions.directionToVector(action, speed)
+        positions[agentIndex] = (x + dx, y + dy)
+        if action != Directions.STOP:
+            directions[agentIndex] = action
+
+        if agentIndex == 0:
+            # Eat, as in PacmanRules.consume; Pacman is always on a grid point
+            position = positions[0]
+            bit = 1 << (position[0] * self.height + position[1])
+            if self.food & bit:
+                scoreChange += 10
+                self.food ^= bit
+                self.numFood -= 1
+                if self.numFood == 0 and not self._lose:
+                    scoreChange += 500
+                    self._win = True
+            if position in self.capsules:
+                self.capsules = tuple(capsule for capsule in self.capsules if capsule != position)
+                for index in range(1, len(scaredTimers)):
+                    scaredTimers[index] = SCARED_TIME
+            scoreChange -= TIME_PENALTY
+            ghosts = range(1, len(positions))
+        else:
+            timer = scaredTimers[agentIndex]
+            if timer == 1:
+                positions[agentIndex] = nearestPoint(positions[agentIndex])
+            scaredTimers[agentIndex] = max(0, timer - 1)
+            ghosts = [agentIndex]
+
+        # Collisions, as in GhostRules.checkDeath
+        pacmanPosition = positions[0]
+        for index in ghosts:
+            if GhostRules.canKill(pacmanPosition, positions[index]):
+                if scaredTimers[index] > 0:
+                    scoreChange += 200
+                    start = self.starts[index]
+                    positions[index] = start.getPosition()
+                    directions[index] = start.getDirection()
+                    scaredTimers[index] = 0
+                elif not self._win:
+                    scoreChange -= 500
+                    self._lose = True
+
+        self.positions = tuple(positions)
+        self.directions = tuple(directions)
+        self.scaredTimers = tuple(scaredTimers)
+        self.score += scoreChange
+
+    def undoMove(self):
+        "Takes back the last move made by doMove"
+        (self.positions, self.directions, self.scaredTimers, self.food, self.numFood,
+         self.capsules, self.score, self._win, self._lose) = self.stack.pop()
+
+    def getPacmanState(self):
+        return self.getAgentState(0)
+
+    def getPacmanPosition(self):
+        return self.positions[0]
+
+    def getAgentState(self, agentIndex):
+        "A new AgentState (game.py) for the agent as it is now"
+        agentState = AgentState(self.starts[agentIndex], agentIndex == 0)
+        agentState.configuration = Configuration(self.positions[agentIndex], self.directions[agentIndex])
+        agentState.scaredTimer = self.scaredTimers[agentIndex]
+        return agentState
+
+    def getGhostStates(self):
+        return [self.getAgentState(index) for index in range(1, len(self.positions))]
+
+    def getGhostState(self, agentIndex):
+        if agentIndex == 0 or agentIndex >= self.getNumAgents():
+            raise Exception("Invalid index passed to getGhostState")
+        return self.getAgentState(agentIndex)
+
+    def getGhostPosition(self, agentIndex):
+        if agentIndex == 0:
+            raise Exception("Pacman's index passed to getGhostPosition")
+        return self.positions[agentIndex]
+
+    def getGhostPositions(self):
+        return list(self.positions[1:])
+
+    def getNumAgents(self):
+        return len(self.positions)
+
+    def getScore(self):
+        return float(self.score)
+
+    def getCapsules(self):
+        return list(self.capsules)
+
+    def getNumFood(self):
+        return self.numFood
+
+    def getFood(self):
+        "A new BitGrid (game.py) of the food left"
+        return BitGrid(self.walls.width, self.height, bits=self.food)
+
+    def getWalls(self):
+        return self.walls
+
+    def hasFood(self, x, y):
+        return self.food >> (x * self.height + y) & 1 == 1
+
+    def hasWall(self, x, y):
+        return self.walls[x][y]
+
+    def isLose(self):
+        return self._lose
+
+    def isWin(self):
+        return self._win
+
 ############################################################################
 #                     THE HIDDEN SECRETS OF PACMAN                         #
 #                                                                          #
@@ -365,6 +584,7 @@ class PacmanRules:
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
         pacmanState.configuration = pacmanState.configuration.generateSuccessor(
             vector)
+        state.data.agentChanged(0)
 
         # Eat
         next = pacmanState.configuration.getPosition()
@@ -381,6 +601,7 @@ class PacmanRules:
             state.data.scoreChange += 10
             state.data.food = state.data.food.copy()
             state.data.food[x][y] = False
+            state.data.foodChanged(x, y)
             state.data._foodEaten = position
             # TODO: cache numFood?
             numFood = state.getNumFood()
@@ -390,10 +611,12 @@ class PacmanRules:
         # Eat capsule
         if(position in state.getCapsules()):
             state.data.capsules.remove(position)
+            state.data.capsuleChanged(position)
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
                 state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.agentChanged(index)
     consume = staticmethod(consume)
 
 
@@ -432,6 +655,7 @@ class GhostRules:
         vector = Actions.directionToVector(action, speed)
         ghostState.configuration = ghostState.configuration.generateSuccessor(
             vector)
+        state.data.agentChanged(ghostIndex)
     applyAction = staticmethod(applyAction)
 
     def decrementTimer(ghostState):
@@ -462,6 +686,7 @@ class GhostRules:
             state.data.scoreChange += 200
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
+            state.data.agentChanged(agentIndex)
             # Added for first-person
             state.data._eaten[agentIndex] = True
         else:
@@ -672,7 +897,12 @@ def replayGame(layout, actions, display):
     display.finish()
 
 
-def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30):
+def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30,
+             trackExplored=False):
+    """
+    Plays numGames games.  With trackExplored the states generated during
+    the games are recorded in GameState.explored (see recordExplored).
+    """
     import __main__
     __main__.__dict__['_display'] = display
 
@@ -691,7 +921,11 @@ def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, c
             rules.quiet = False
         game = rules.newGame(layout, pacman, ghosts,
                              gameDisplay, beQuiet, catchExceptions)
-        game.run()
+        if trackExplored:
+            with recordExplored():
+                game.run()
+        else:
+            game.run()
         if not beQuiet:
             games.append(game)
 
@@ -0,0 +1,110 @@
+# test_game.py
+# ------------
+# Checks GameStateData's incrementally updated hash against a hash worked
+# out from scratch, and its equality against a field by field comparison,
+# over random games.
+
+import random
+import unittest
+
+import layout
+import pacman
+from game import HASH_MODULUS
+
+LAYOUTS = {
+    'capsules': ['%%%%%%%%%%%%',
+                 '%o...%...G.%',
+                 '%.%%.%.%%%.%',
+                 '%P...o.....%',
+                 '%.%%%%.%%%o%',
+                 '%....G.....%',
+                 '%%%%%%%%%%%%'],
+    'open': ['%%%%%%%%',
+             '%P.....%',
+             '%.o..o.%',
+             '%..G...%',
+             '%.....G%',
+             '%%%%%%%%'],
+}
+
+
+def newGame(name, numGhosts=2):
+    state = pacman.GameState()
+    state.initialize(layout.Layout(LAYOUTS[name]), numGhosts)
+    return state
+
+
+def referenceHash(data):
+    "GameStateData.__hash__ worked out from the state alone, with no cache"
+    height = data.layout.height
+    food = 0
+    for x, y in data.food.asList():
+        food |= 1 << (x * height + y)
+    agents = sum(hash((index, agentState)) for index, agentState in enumerate(data.agentStates))
+    capsules = sum(hash(capsule) for capsule in data.capsules)
+    return (agents + 13 * food + 113 * capsules + 7 * hash(data.score)) % HASH_MODULUS
+
+
+def signature(data):
+    "Everything GameStateData.__eq__ compares, as a plain tuple"
+    agents = tuple((agentState.configuration, agentState.scaredTimer) for agentState in data.agentStates)
+    return (data.score, agents, tuple(data.capsules), tuple(sorted(data.food.asList())))
+
+
+def randomGames(rng, name, games, hashFirst):
+    """
+    Yields the states of random games, each state after every agent's move.
+    With hashFirst the start state is hashed before any move, so every later
+    hash is the incrementally updated one.
+    """
+    for _ in range(games):
+        state = newGame(name)
+        if hashFirst:
+            hash(state)
+        agentIndex = 0
+        while not (state.isWin() or state.isLose()):
+            state = state.generateSuccessor(agentIndex, rng.choice(state.getLegalActions(agentIndex)))
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+            yield state
+
+
+class IncrementalHashTest(unittest.TestCase):
+
+    def testMatchesAHashFromScratch(self):
+        rng = random.Random(0)
+        for name in LAYOUTS:
+            for hashFirst in [True, False]:
+                for state in randomGames(rng, name, 20, hashFirst):
+                    self.assertEqual(hash(state.data), referenceHash(state.data))
+
+    def testCopiesHashLikeTheOriginal(self):
+        rng = random.Random(1)
+        for state in randomGames(rng, 'capsules', 5, True):
+            self.assertEqual(hash(state.deepCopy().data), hash(state.data))
+
+    def testEqualityMatchesAFieldComparison(self):
+        rng = random.Random(2)
+        for name in LAYOUTS:
+            states = list(randomGames(rng, name, 10, True))
+            rng.shuffle(states)
+            for first, second in zip(states, states[1:] + states[:1]):
+                equal = signature(first.data) == signature(second.data)
+                self.assertEqual(first == second, equal)
+                if equal:
+                    self.assertEqual(hash(first), hash(second))
+
+    def testMoveOrderDoesNotMatter(self):
+        start = newGame('capsules')
+        hash(start)
+        for pacmanAction in start.getLegalActions(0):
+            for ghostAction in start.getLegalActions(1):
+                first = start.generateSuccessor(0, pacmanAction).generateSuccessor(1, ghostAction)
+                second = start.generateSuccessor(1, ghostAction).generateSuccessor(0, pacmanAction)
+                self.assertEqual(signature(first.data), signature(second.data))
+                self.assertEqual(first, second)
+                self.assertEqual(hash(first), hash(second))
+                self.assertEqual(len(set([first, second])), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
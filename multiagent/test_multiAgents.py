@@ -0,0 +1,85 @@
+# test_multiAgents.py
+# -------------------
+# Checks MutableGameState's doMove/undoMove against GameState's successors
+# and the transposition table's incremental Zobrist keys against keys
+# built from scratch, over random games.
+
+import random
+import unittest
+
+import multiAgents
+from pacman import MutableGameState
+from test_game import LAYOUTS, newGame
+
+
+def summary(state):
+    "What a search can see of a GameState or MutableGameState"
+    return (multiAgents.agentTuples(state), state.getScore(), sorted(state.getFood().asList()),
+            sorted(state.getCapsules()), state.isWin(), state.isLose())
+
+
+def randomMoves(rng, state):
+    "The (agentIndex, action) pairs of one random game from 'state'"
+    moves = []
+    agentIndex = 0
+    while not (state.isWin() or state.isLose()):
+        action = rng.choice(state.getLegalActions(agentIndex))
+        moves.append((agentIndex, action))
+        state = state.generateSuccessor(agentIndex, action)
+        agentIndex = (agentIndex + 1) % state.getNumAgents()
+    return moves
+
+
+class MutableGameStateTest(unittest.TestCase):
+
+    def testDoMoveMatchesGenerateSuccessor(self):
+        rng = random.Random(0)
+        for name in LAYOUTS:
+            for _ in range(20):
+                state = newGame(name)
+                mutable = MutableGameState(state)
+                history = [summary(state)]
+                for agentIndex, action in randomMoves(rng, state):
+                    self.assertEqual(mutable.getLegalActions(agentIndex), state.getLegalActions(agentIndex))
+                    state = state.generateSuccessor(agentIndex, action)
+                    mutable.doMove(agentIndex, action)
+                    self.assertEqual(summary(mutable), summary(state))
+                    history.append(summary(state))
+                history.pop()
+                while history:
+                    mutable.undoMove()
+                    self.assertEqual(summary(mutable), history.pop())
+
+
+class ZobristKeyTest(unittest.TestCase):
+
+    def testChildKeyMatchesStateKey(self):
+        rng = random.Random(1)
+        for name in LAYOUTS:
+            for _ in range(20):
+                table = multiAgents.TranspositionTable(64)
+                state = newGame(name)
+                mutable = MutableGameState(state)
+                key = mutableKey = table.stateKey(state)
+                self.assertEqual(table.stateKey(mutable), key)
+                for agentIndex, action in randomMoves(rng, state):
+                    child = state.generateSuccessor(agentIndex, action)
+                    key = table.childKey(key, state, agentIndex, child)
+                    self.assertEqual(key, table.stateKey(child))
+                    mutable.doMove(agentIndex, action)
+                    mutableKey = table.childKey(mutableKey, mutable, agentIndex, mutable)
+                    self.assertEqual(mutableKey, key)
+                    state = child
+
+    def testEqualStatesShareAKey(self):
+        table = multiAgents.TranspositionTable(64)
+        start = newGame('capsules')
+        for pacmanAction in start.getLegalActions(0):
+            for ghostAction in start.getLegalActions(1):
+                first = start.generateSuccessor(0, pacmanAction).generateSuccessor(1, ghostAction)
+                second = start.generateSuccessor(1, ghostAction).generateSuccessor(0, pacmanAction)
+                self.assertEqual(table.stateKey(first), table.stateKey(second))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -206,6 +206,8 @@ class Grid:
     def __eq__(self, other):
         if other == None:
             return False
+        if isinstance(other, BitGrid):
+            return other == self
         return self.data == other.data
 
     def __hash__(self):
@@ -300,6 +302,159 @@ def reconstituteGrid(bitRep):
     width, height = bitRep[:2]
     return Grid(width, height, bitRepresentation=bitRep[2:])
 
+
+# Python hashes a non-negative int n as n mod HASH_MODULUS, a Mersenne prime
+# 2**k - 1, so 2**i hashes to 2**(i % k).  BitGrid uses this to keep its hash
+# in step with its bits without rehashing the whole integer.
+HASH_MODULUS = sys.hash_info.modulus
+HASH_PERIOD = HASH_MODULUS.bit_length()
+
+
+class BitGrid:
+    """
+    A drop-in replacement for Grid whose cells are the bits of one Python
+    int: cell (x,y) is bit x * height + y, the same order Grid.asList and
+    Grid.__hash__ use, so a BitGrid equals and hashes like a Grid holding
+    the same cells.  Cells are still read and written via grid[x][y].
+
+    The number of True cells and the hash are updated on every write, so
+    count() and hash() are O(1).  asList() only visits set bits, and copy()
+    is O(1): the int is immutable, so copies share it until one of them is
+    written to.
+    """
+
+    def __init__(self, width, height, initialValue=False, bits=0):
+        if initialValue not in [False, True]:
+            raise Exception('Grids can only contain booleans')
+        self.width = width
+        self.height = height
+        if initialValue:
+            bits = (1 << (width * height)) - 1
+        self.bits = bits
+        self._count = bin(bits).count('1')
+        self._hash = bits % HASH_MODULUS
+        self._columns = None
+
+    def __getitem__(self, x):
+        if self._columns is None:
+            self._columns = [BitGridColumn(self, i) for i in range(self.width)]
+        return self._columns[x]
+
+    def __setitem__(self, x, column):
+        for y, value in enumerate(column):
+            self._set(x * self.height + y, value)
+
+    def _set(self, index, value):
+        mask = 1 << index
+        if value:
+            if not self.bits & mask:
+                self.bits |= mask
+                self._count += 1
+                self._hash = (self._hash + (1 << (index % HASH_PERIOD))) % HASH_MODULUS
+        elif self.bits & mask:
+            self.bits ^= mask
+            self._count -= 1
+            self._hash = (self._hash - (1 << (index % HASH_PERIOD))) % HASH_MODULUS
+
+    def __str__(self):
+        return str(self.toGrid())
+
+    def __eq__(self, other):
+        if isinstance(other, BitGrid):
+            return self.bits == other.bits and self.width == other.width and self.height == other.height
+        if isinstance(other, Grid):
+            return self == gridToBitGrid(other)
+        return False
+
+    def __hash__(self):
+        return self._hash
+
+    def copy(self):
+        g = BitGrid(self.width, self.height)
+        g.bits, g._count, g._hash = self.bits, self._count, self._hash
+        return g
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def count(self, item=True):
+        if item is True:
+            return self._count
+        if item is False:
+            return self.width * self.height - self._count
+        return 0
+
+    def asList(self, key=True):
+        bits = self.bits
+        if not key:
+            bits ^= (1 << (self.width * self.height)) - 1
+        list = []
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            list.append((index // self.height, index % self.height))
+            bits ^= low
+        return list
+
+    def packBits(self):
+        "Returns the same (width, height, bitPackedInts...) tuple as Grid.packBits"
+        return self.toGrid().packBits()
+
+    def toGrid(self):
+        "Returns a list-of-lists Grid with the same cells"
+        g = Grid(self.width, self.height)
+        for x, y in self.asList():
+            g.data[x][y] = True
+        return g
+
+
+class BitGridColumn:
+    "The column grid[x] of a BitGrid; reads and writes the grid's bits."
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.height = grid.height
+        self.offset = x * grid.height
+
+    def _index(self, y):
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError('BitGrid index out of range')
+        return self.offset + y
+
+    def __getitem__(self, y):
+        if 0 <= y < self.height:
+            return self.grid.bits >> (self.offset + y) & 1 == 1
+        return self.grid.bits >> self._index(y) & 1 == 1
+
+    def __setitem__(self, y, value):
+        self.grid._set(self._index(y), value)
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield self[y]
+
+
+def gridToBitGrid(grid):
+    "Returns a BitGrid with the same cells as a Grid"
+    if isinstance(grid, BitGrid):
+        return grid.copy()
+    bits = 0
+    index = 0
+    for column in grid.data:
+        for value in column:
+            if value:
+                bits |= 1 << index
+            index += 1
+    return BitGrid(grid.width, grid.height, bits=bits)
+
 ####################################
 # Parts you shouldn't have to read #
 ####################################
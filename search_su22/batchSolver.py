@@ -0,0 +1,166 @@
+# batchSolver.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Solves many independent search problems in parallel.
+
+A batch is a list of BatchSpecs, each naming a layout, a search problem
+class from searchAgents.py, a search function from search.py and, for
+informed searches, a heuristic (from searchAgents.py or search.py).  A spec
+may also give a start position for Pacman.  solveBatch fans the specs out
+over a process pool and yields a result dict for each one as soon as it
+finishes, so results arrive in completion order, not spec order.
+
+Each worker process keeps the layouts it has parsed, so a layout is read
+once per worker however many specs use it.  A search that runs past its
+time budget or expansion budget is stopped from inside the worker and
+reported with status 'timeout' or 'budget'; the worker goes on to the next
+spec.
+
+>>> specs = [BatchSpec('mediumMaze', 'PositionSearchProblem', 'astar', 'manhattanHeuristic')]
+>>> for result in solveBatch(specs): print(result['status'], result['pathCost'])
+ok 68
+
+> python batchSolver.py -l tinyMaze,mediumMaze,bigMaze -a bfs,astar -w 4
+"""
+
+import concurrent.futures
+import contextlib
+import io
+import optparse
+import os
+import time
+from collections import namedtuple
+from game import Configuration, Directions
+import layout
+import pacman
+import search
+import searchAgents
+import searchBenchmark
+
+class BatchSpec(namedtuple('BatchSpec', ['layout', 'problem', 'algorithm', 'heuristic', 'start'])):
+    """
+    One search to run: the layout name, the problem class name, the search
+    function name, the heuristic name (None for nullHeuristic) and Pacman's
+    start position (None for the layout's own).
+    """
+    def __new__(cls, layout, problem, algorithm, heuristic=None, start=None):
+        return super(BatchSpec, cls).__new__(cls, layout, problem, algorithm, heuristic, start)
+
+class SearchTimeout(Exception):
+    pass
+
+layoutCache = {} # Layouts parsed by this process, by name
+
+def getCachedLayout(name):
+    if name not in layoutCache:
+        lay = layout.tryToLoad(os.path.join(searchBenchmark.LAYOUT_DIRECTORY, name + '.lay'))
+        if lay is None:
+            raise Exception('The layout ' + name + ' cannot be found')
+        layoutCache[name] = lay
+    return layoutCache[name]
+
+def lookupHeuristic(name):
+    if name is None:
+        return search.nullHeuristic
+    if hasattr(searchAgents, name):
+        return getattr(searchAgents, name)
+    if hasattr(search, name):
+        return getattr(search, name)
+    raise AttributeError(name + ' is not a function in searchAgents.py or search.py.')
+
+def makeProblem(name, gameState):
+    if name in searchBenchmark.PROBLEMS:
+        return searchBenchmark.PROBLEMS[name][0](gameState)
+    if not name.endswith('Problem') or not hasattr(searchAgents, name):
+        raise AttributeError(name + ' is not a search problem type in searchAgents.py.')
+    return getattr(searchAgents, name)(gameState)
+
+def solveSpec(index, spec, timeout, maxExpanded):
+    """
+    Runs one spec in the current process and returns its result dict: the
+    spec's fields, its 'index' in the batch, 'status' ('ok', 'nopath',
+    'timeout', 'budget' or 'error: ...'), 'path', 'pathCost', 'expanded'
+    and 'wallTime'.
+    """
+    result = dict(spec._asdict())
+    result.update({'index': index, 'status': 'ok', 'path': None, 'pathCost': None, 'expanded': None})
+    start = time.perf_counter()
+    try:
+        gameState = pacman.GameState()
+        gameState.initialize(getCachedLayout(spec.layout), 0)
+        if spec.start is not None:
+            gameState.data.agentStates[0].configuration = Configuration(tuple(spec.start), Directions.STOP)
+        func = getattr(search, spec.algorithm)
+        # The problems print warnings about unusual layouts; keep workers quiet
+        with contextlib.redirect_stdout(io.StringIO()):
+            problem = makeProblem(spec.problem, gameState)
+            searchBenchmark.limitExpansions(problem, maxExpanded, timeout, SearchTimeout)
+            try:
+                if 'heuristic' in func.__code__.co_varnames:
+                    path = func(problem, heuristic=lookupHeuristic(spec.heuristic))
+                else:
+                    path = func(problem)
+            finally:
+                result['expanded'] = problem._expanded
+        if path is None:
+            result['status'] = 'nopath'
+        else:
+            result['path'] = path
+            result['pathCost'] = problem.getCostOfActions(path)
+    except SearchTimeout:
+        result['status'] = 'timeout'
+    except searchBenchmark.BudgetExceeded:
+        result['status'] = 'budget'
+    except Exception as e:
+        result['status'] = 'error: %r' % e
+    result['wallTime'] = round(time.perf_counter() - start, 6)
+    return result
+
+def solveBatch(specs, workers=None, timeout=10.0, maxExpanded=1000000):
+    """
+    Solves every spec on a pool of 'workers' processes (default: one per
+    CPU) and yields their result dicts as they finish.  'timeout' is the
+    number of seconds each search may run for.
+    """
+    specs = [spec if isinstance(spec, BatchSpec) else BatchSpec(*spec) for spec in specs]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(solveSpec, index, spec, timeout, maxExpanded)
+                   for index, spec in enumerate(specs)]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+if __name__ == '__main__':
+    parser = optparse.OptionParser('python batchSolver.py [options]')
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='comma separated layout names (default: every layout)')
+    parser.add_option('-p', '--problem', dest='problem', default='PositionSearchProblem',
+                      help='the problem class to solve (default %default)')
+    parser.add_option('-a', '--algorithms', dest='algorithms', default='bfs,astar',
+                      help='comma separated search functions (default %default)')
+    parser.add_option('--heuristic', dest='heuristic', default=None,
+                      help='the heuristic for informed searches (default: nullHeuristic)')
+    parser.add_option('-w', '--workers', dest='workers', type='int', default=None,
+                      help='worker processes (default: one per CPU)')
+    parser.add_option('-t', '--timeout', dest='timeout', type='float', default=10.0,
+                      help='seconds each search may run (default %default)')
+    options, _ = parser.parse_args()
+
+    names = options.layouts.split(',') if options.layouts else [name for name, _ in searchBenchmark.loadLayouts()]
+    specs = [BatchSpec(name, options.problem, algorithm, options.heuristic)
+             for name in names for algorithm in options.algorithms.split(',')]
+    for result in solveBatch(specs, options.workers, options.timeout):
+        print('%-18s %-6s %-8s expanded %-8s cost %-6s %.3fs' % (
+            result['layout'], result['algorithm'], result['status'], result['expanded'],
+            result['pathCost'], result['wallTime']))
@@ -0,0 +1,77 @@
+# closestDotBenchmark.py
+# ----------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Compares three ways of planning the greedy closest dot tour:
+
+  search       ClosestDotSearchAgent as it stands: a fresh A* search on an
+               AnyFoodSearchProblem for every dot (the baseline)
+  table        ClosestDotSearchAgent with table=True, reading the all-pairs
+               DistanceTable
+  incremental  ClosestDotSearchAgent with incremental=True, repairing one
+               NearestFoodField as dots are eaten
+
+For each it prints the tour length, the nodes expanded (cells labelled for
+the incremental field; the table is built by one BFS per open cell) and the
+wall time, including any table built on the way.  All three head for a
+closest dot at every step, but they break ties between equally close dots
+differently, so the tour lengths need not agree.
+
+> python closestDotBenchmark.py -l bigSearch
+"""
+
+import optparse
+import time
+import layout
+import pacman
+import searchAgents
+import distanceCalculator
+
+def agentTour(gameState, **options):
+    "Returns (actions, expanded) for a tour planned by ClosestDotSearchAgent"
+    agent = searchAgents.ClosestDotSearchAgent(**options)
+    agent.registerInitialState(gameState)
+    expanded = agent._expanded
+    if options.get('table'):
+        expanded += distanceCalculator.getDistanceTable(gameState.getWalls()).size ** 2
+    return agent.actions, expanded
+
+PLANNERS = [('search', agentTour),
+            ('table', lambda gameState: agentTour(gameState, table=True)),
+            ('incremental', lambda gameState: agentTour(gameState, incremental=True))]
+
+def runBenchmark(layoutName):
+    lay = layout.getLayout(layoutName)
+    if lay is None:
+        raise Exception('The layout ' + layoutName + ' cannot be found')
+    results = []
+    for name, planner in PLANNERS:
+        distanceCalculator.distanceMap.clear()
+        distanceCalculator.lastLookup[0] = distanceCalculator.lastLookup[1] = None
+        gameState = pacman.GameState()
+        gameState.initialize(lay, 0)
+        start = time.perf_counter()
+        actions, expanded = planner(gameState)
+        results.append((name, len(actions), expanded, time.perf_counter() - start))
+    print('%-12s %8s %10s %9s' % ('planner', 'cost', 'expanded', 'seconds'))
+    for name, cost, expanded, seconds in results:
+        print('%-12s %8d %10d %9.3f' % (name, cost, expanded, seconds))
+    return results
+
+if __name__ == '__main__':
+    parser = optparse.OptionParser('python closestDotBenchmark.py [-l LAYOUT]')
+    parser.add_option('-l', '--layout', dest='layout', default='bigSearch',
+                      help='the layout to plan a tour of (default %default)')
+    options, _ = parser.parse_args()
+    runBenchmark(options.layout)
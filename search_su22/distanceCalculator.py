@@ -0,0 +1,240 @@
+# distanceCalculator.py
+# ---------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+# 
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+This file contains a DistanceTable object which holds the maze distance
+between every pair of open cells of a layout.  Tables are computed once per
+walls grid (one BFS per open cell) and shared through a module level cache,
+so every search problem, heuristic and agent on the same layout reuses them.
+
+Example:
+table = getDistanceTable(gameState.getWalls())
+table.getDistance( (1,1), (10,10) )
+"""
+
+from array import array
+import heapq
+
+try:
+    import numpy
+    _NUMPY_ENABLED = True
+except:
+    _NUMPY_ENABLED = False
+
+UNREACHABLE = -1
+
+class DistanceTable:
+    """
+    All-pairs maze distances over the open cells of a walls Grid.
+
+    Open cells are numbered in Grid order (x major, then y); self.index maps
+    a position to its number and self.cells maps it back.  Distances are
+    stored row by row in one flat int16 buffer (a NumPy array when NumPy is
+    available, an array('h') otherwise), so the distance from cell i to cell
+    j is self.matrix[i * self.size + j].  Unreachable pairs hold UNREACHABLE.
+    """
+    def __init__(self, walls):
+        self.walls = walls
+        self.cells = walls.asList(False)
+        self.index = dict((cell, i) for i, cell in enumerate(self.cells))
+        self.size = len(self.cells)
+        self.neighbors = [self._neighborIndices(cell) for cell in self.cells]
+        if _NUMPY_ENABLED:
+            self.matrix = numpy.full(self.size * self.size, UNREACHABLE, dtype=numpy.int16)
+        else:
+            self.matrix = array('h', [UNREACHABLE]) * (self.size * self.size)
+        for source in range(self.size):
+            self._fillRow(source)
+
+    def _neighborIndices(self, cell):
+        x, y = cell
+        adjacent = [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]
+        return [self.index[other] for other in adjacent if other in self.index]
+
+    def _fillRow(self, source):
+        "Breadth first search from 'source' into its row of the matrix"
+        row = array('h', [UNREACHABLE]) * self.size
+        row[source] = 0
+        frontier = [source]
+        depth = 0
+        neighbors = self.neighbors
+        while frontier:
+            depth += 1
+            nextFrontier = []
+            for node in frontier:
+                for other in neighbors[node]:
+                    if row[other] == UNREACHABLE:
+                        row[other] = depth
+                        nextFrontier.append(other)
+            frontier = nextFrontier
+        start = source * self.size
+        if _NUMPY_ENABLED:
+            self.matrix[start:start + self.size] = numpy.frombuffer(row, dtype=numpy.int16)
+        else:
+            self.matrix[start:start + self.size] = row
+
+    def getDistance(self, pos1, pos2):
+        """
+        Returns the maze distance between two open cells, or UNREACHABLE if
+        no path connects them.
+        """
+        return int(self.matrix[self.index[pos1] * self.size + self.index[pos2]])
+
+    def getRow(self, pos):
+        """
+        Returns the distances from 'pos' to every open cell, indexed by cell
+        number (see self.index).
+        """
+        start = self.index[pos] * self.size
+        return self.matrix[start:start + self.size]
+
+    def getNextStep(self, pos, target):
+        """
+        Returns an open neighbour of 'pos' that is one step closer to
+        'target', or None if pos is the target or cannot reach it.
+        """
+        i, j = self.index[pos], self.index[target]
+        distance = self.matrix[i * self.size + j]
+        if distance <= 0:
+            return None
+        for other in self.neighbors[i]:
+            if self.matrix[other * self.size + j] == distance - 1:
+                return self.cells[other]
+        return None
+
+class NearestFoodField:
+    """
+    The maze distance from every open cell to its nearest remaining dot,
+    kept up to date as dots are removed.
+
+    The field is filled once by a breadth first search from all the dots
+    together.  Each cell also remembers which dot it is nearest to, so
+    removing a dot only has to recompute the cells that were nearest to it:
+    they are re-seeded from the surrounding cells, whose values are still
+    exact, and relabelled with a small Dijkstra over that region alone.
+
+    self.expanded counts the cells labelled so far (by the first fill and
+    by every repair), the analogue of nodes expanded by a search.
+    """
+    def __init__(self, walls, food):
+        self.table = getDistanceTable(walls)
+        size = self.table.size
+        self.distance = array('l', [UNREACHABLE]) * size
+        self.nearest = array('l', [UNREACHABLE]) * size
+        self.expanded = 0
+        index = self.table.index
+        frontier = [index[dot] for dot in food]
+        for node in frontier:
+            self.distance[node] = 0
+            self.nearest[node] = node
+        self._spread(frontier)
+
+    def _spread(self, frontier):
+        "Breadth first search outwards from 'frontier' into unlabelled cells"
+        distance, nearest, neighbors = self.distance, self.nearest, self.table.neighbors
+        self.expanded += len(frontier)
+        while frontier:
+            nextFrontier = []
+            for node in frontier:
+                depth = distance[node] + 1
+                for other in neighbors[node]:
+                    if distance[other] == UNREACHABLE:
+                        distance[other] = depth
+                        nearest[other] = nearest[node]
+                        nextFrontier.append(other)
+            self.expanded += len(nextFrontier)
+            frontier = nextFrontier
+
+    def getDistance(self, pos):
+        "Returns the distance from 'pos' to the nearest dot, or UNREACHABLE"
+        return self.distance[self.table.index[pos]]
+
+    def getNextStep(self, pos):
+        """
+        Returns an open neighbour of 'pos' one step closer to the nearest dot,
+        or None if pos holds a dot or no dot can be reached.
+        """
+        node = self.table.index[pos]
+        distance = self.distance[node]
+        if distance <= 0:
+            return None
+        for other in self.table.neighbors[node]:
+            if self.distance[other] == distance - 1:
+                return self.table.cells[other]
+        return None
+
+    def removeFood(self, pos):
+        "Removes the dot at 'pos' and repairs the cells that were nearest to it"
+        distance, nearest, neighbors = self.distance, self.nearest, self.table.neighbors
+        dot = self.table.index[pos]
+        if nearest[dot] != dot:
+            return
+        region = self._region(dot)
+        for node in region:
+            distance[node] = UNREACHABLE
+            nearest[node] = UNREACHABLE
+        fringe = []
+        for node in region:
+            for other in neighbors[node]:
+                if distance[other] != UNREACHABLE:
+                    heapq.heappush(fringe, (distance[other] + 1, node, nearest[other]))
+        while fringe:
+            depth, node, source = heapq.heappop(fringe)
+            if distance[node] != UNREACHABLE:
+                continue
+            distance[node] = depth
+            nearest[node] = source
+            self.expanded += 1
+            for other in neighbors[node]:
+                if distance[other] == UNREACHABLE:
+                    heapq.heappush(fringe, (depth + 1, other, source))
+
+    def _region(self, dot):
+        """
+        The cells labelled with 'dot' as their nearest.  Every such cell took
+        its label from a neighbour with the same label, so flooding out from
+        the dot finds them all without scanning the whole field.
+        """
+        nearest, neighbors = self.nearest, self.table.neighbors
+        region = [dot]
+        seen = set(region)
+        for node in region:
+            for other in neighbors[node]:
+                if other not in seen and nearest[other] == dot:
+                    seen.add(other)
+                    region.append(other)
+        return region
+
+##########################################
+# CACHE OF DISTANCE TABLES PER WALLS GRID #
+##########################################
+
+distanceMap = {}
+lastLookup = [None, None] # (walls, table) of the most recent call
+
+def getDistanceTable(walls):
+    """
+    Returns the DistanceTable for a walls Grid, computing it on first use.
+
+    Tables are cached by the walls grid itself, so equal walls share a table.
+    Hashing a Grid walks every cell, so the most recently used walls object
+    is also remembered by identity to make repeated lookups O(1).
+    """
+    if lastLookup[0] is walls:
+        return lastLookup[1]
+    if walls not in distanceMap:
+        distanceMap[walls] = DistanceTable(walls)
+    table = distanceMap[walls]
+    lastLookup[0], lastLookup[1] = walls, table
+    return table
@@ -14,9 +14,26 @@
 
 import search
 import random
+import os
+from array import array
+from collections import deque
+
+GOAL_TILES = (0, 1, 2, 3, 4, 5, 6, 7, 8)
 
 # Module Classes
 
+# Cells are numbered row by row, 0 to 8.  NEIGHBORS[i] lists the moves of
+# the blank out of cell i as (move, cell the blank moves to) pairs.
+NEIGHBORS = []
+for index in range( 9 ):
+    row, col = divmod( index, 3 )
+    moves = []
+    if row != 0: moves.append( ('up', index - 3) )
+    if row != 2: moves.append( ('down', index + 3) )
+    if col != 0: moves.append( ('left', index - 1) )
+    if col != 2: moves.append( ('right', index + 1) )
+    NEIGHBORS.append( moves )
+
 class EightPuzzleState:
     """
     The Eight Puzzle is described in the course textbook on
@@ -46,18 +63,24 @@ class EightPuzzleState:
             | 6 | 7 | 8 |
             ------------
 
-        The configuration of the puzzle is stored in a 2-dimensional
-        list (a list of lists) 'cells'.
+        The configuration of the puzzle is stored row by row in the
+        tuple 'tiles', with the index of the blank in 'blank'.  The
+        hash of the tuple is computed once, so states are cheap to
+        store in the closed set and the fringe.
         """
-        self.cells = []
-        numbers = numbers[:] # Make a copy so as not to cause side-effects.
-        numbers.reverse()
-        for row in range( 3 ):
-            self.cells.append( [] )
-            for col in range( 3 ):
-                self.cells[row].append( numbers.pop() )
-                if self.cells[row][col] == 0:
-                    self.blankLocation = row, col
+        self.tiles = tuple( numbers )
+        self.blank = self.tiles.index( 0 )
+        self._hash = hash( self.tiles )
+
+    @property
+    def cells( self ):
+        "The configuration as a list of three rows"
+        return [list( self.tiles[row * 3:row * 3 + 3] ) for row in range( 3 )]
+
+    @property
+    def blankLocation( self ):
+        "The (row, col) of the blank"
+        return divmod( self.blank, 3 )
 
     def isGoal( self ):
         """
@@ -77,13 +100,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).isGoal()
         False
         """
-        current = 0
-        for row in range( 3 ):
-            for col in range( 3 ):
-                if current != self.cells[row][col]:
-                    return False
-                current += 1
-        return True
+        return self.tiles == GOAL_TILES
 
     def legalMoves( self ):
         """
@@ -95,17 +112,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([0, 1, 2, 3, 4, 5, 6, 7, 8]).legalMoves()
         ['down', 'right']
         """
-        moves = []
-        row, col = self.blankLocation
-        if(row != 0):
-            moves.append('up')
-        if(row != 2):
-            moves.append('down')
-        if(col != 0):
-            moves.append('left')
-        if(col != 2):
-            moves.append('right')
-        return moves
+        return [move for move, cell in NEIGHBORS[self.blank]]
 
     def result(self, move):
         """
@@ -113,37 +120,21 @@ class EightPuzzleState:
         updated based on the provided move.
 
         The move should be a string drawn from a list returned by legalMoves.
-        Illegal moves will raise an exception, which may be an array bounds
-        exception.
+        Illegal moves raise an exception.
 
         NOTE: This function *does not* change the current object.  Instead,
         it returns a new object.
         """
-        row, col = self.blankLocation
-        if(move == 'up'):
-            newrow = row - 1
-            newcol = col
-        elif(move == 'down'):
-            newrow = row + 1
-            newcol = col
-        elif(move == 'left'):
-            newrow = row
-            newcol = col - 1
-        elif(move == 'right'):
-            newrow = row
-            newcol = col + 1
-        else:
-            raise "Illegal Move"
-
-        # Create a copy of the current eightPuzzle
-        newPuzzle = EightPuzzleState([0, 0, 0, 0, 0, 0, 0, 0, 0])
-        newPuzzle.cells = [values[:] for values in self.cells]
-        # And update it to reflect the move
-        newPuzzle.cells[row][col] = self.cells[newrow][newcol]
-        newPuzzle.cells[newrow][newcol] = self.cells[row][col]
-        newPuzzle.blankLocation = newrow, newcol
-
-        return newPuzzle
+        for legalMove, cell in NEIGHBORS[self.blank]:
+            if legalMove == move:
+                return self.swapBlank( cell )
+        raise Exception( "Illegal Move" )
+
+    def swapBlank( self, cell ):
+        "Returns the puzzle with the blank and the tile in 'cell' swapped"
+        tiles = list( self.tiles )
+        tiles[self.blank], tiles[cell] = tiles[cell], 0
+        return EightPuzzleState( tiles )
 
     # Utilities for comparison and display
     def __eq__(self, other):
@@ -155,13 +146,10 @@ class EightPuzzleState:
               EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left')
           True
         """
-        for row in range( 3 ):
-            if self.cells[row] != other.cells[row]:
-                return False
-        return True
+        return self.tiles == other.tiles
 
     def __hash__(self):
-        return hash(str(self.cells))
+        return self._hash
 
     def __getAsciiString(self):
         """
@@ -194,9 +182,10 @@ class EightPuzzleSearchProblem(search.SearchProblem):
     def __init__(self,puzzle):
         "Creates a new EightPuzzleSearchProblem which stores search information."
         self.puzzle = puzzle
+        self._expanded = 0
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -207,9 +196,10 @@ class EightPuzzleSearchProblem(search.SearchProblem):
           each succesor is either left, right, up, or down
           from the original state and the cost is 1.0 for each
         """
+        self._expanded += 1
         succ = []
-        for a in state.legalMoves():
-            succ.append((state.result(a), a, 1))
+        for a, cell in NEIGHBORS[state.blank]:
+            succ.append((state.swapBlank(cell), a, 1))
         return succ
 
     def getCostOfActions(self, actions):
@@ -221,6 +211,167 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         """
         return len(actions)
 
+# Heuristics
+
+# MANHATTAN[tile][cell] is the distance from 'cell' to the goal cell of 'tile'
+MANHATTAN = [[abs(tile // 3 - cell // 3) + abs(tile % 3 - cell % 3) for cell in range(9)]
+             for tile in range(9)]
+
+def eightPuzzleManhattan(state, problem=None):
+    "The sum of the Manhattan distances of the tiles from their goal cells"
+    distance = 0
+    for cell, tile in enumerate(state.tiles):
+        if tile:
+            distance += MANHATTAN[tile][cell]
+    return distance
+
+def lineConflicts(line):
+    """
+    For the goal lines (rows or columns) of the tiles in one line, given in
+    board order, returns how many tiles must leave the line so the rest are
+    in goal order: tiles in the line that are not in its longest increasing
+    subsequence.  'line' only holds tiles whose goal is this line.
+    """
+    longest = [1] * len(line)
+    for i in range(len(line)):
+        for j in range(i):
+            if line[j] < line[i] and longest[j] + 1 > longest[i]:
+                longest[i] = longest[j] + 1
+    return len(line) - max(longest) if line else 0
+
+def linearConflictHeuristic(state, problem=None):
+    """
+    Manhattan distance plus two moves for every tile that has to step out
+    of its goal row or column to let another tile in the same line pass.
+    It never overestimates, and always dominates eightPuzzleManhattan.
+    """
+    tiles = state.tiles
+    conflicts = 0
+    for line in range(3):
+        row = [tile for tile in tiles[line * 3:line * 3 + 3] if tile and tile // 3 == line]
+        column = [tile for tile in tiles[line::3] if tile and tile % 3 == line]
+        conflicts += lineConflicts(row) + lineConflicts(column)
+    return eightPuzzleManhattan(state) + 2 * conflicts
+
+# Additive pattern databases
+
+PATTERNS = [(1, 2, 3, 4), (5, 6, 7, 8)]
+PATTERN_DATABASE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+PATTERN_DATABASE_MAGIC = b'8PDB'
+PATTERN_DATABASE_VERSION = 2 # 1 was keyed on the tile cells alone
+UNSEEN = 255
+
+def patternIndex(positions, blank):
+    "The table index for the cells holding a pattern's tiles, in pattern order, and the blank"
+    index = 0
+    for cell in positions:
+        index = index * 9 + cell
+    return index * 9 + blank
+
+def buildPatternDatabase(pattern):
+    """
+    Returns an array('B') with 9 ** (len(pattern) + 1) entries that holds,
+    for every placement of the pattern's tiles and the blank, the fewest
+    moves of those tiles needed to bring them home, with the other tiles
+    treated as blanks.
+
+    The table is filled by a 0-1 breadth first search backwards from the
+    goal over (tile cells, blank cell) states: a move costs 1 when the
+    blank swaps with a pattern tile and 0 otherwise.  Because only the
+    pattern's own moves are counted, the values of disjoint patterns can be
+    added and still never overestimate.  Keying on the blank as well keeps
+    each table an exact distance in its abstract puzzle, so a move changes
+    it by at most its cost and the sum stays consistent; a table keyed on
+    the tiles alone, taking the minimum over blank cells, is not.
+    """
+    table = array('B', [UNSEEN]) * (9 ** (len(pattern) + 1))
+    start = (tuple(pattern), 0)
+    distance = {start: 0}
+    frontier = deque([start])
+    while frontier:
+        state = frontier.popleft()
+        positions, blank = state
+        cost = distance[state]
+        table[patternIndex(positions, blank)] = cost
+        for move, cell in NEIGHBORS[blank]:
+            if cell in positions:
+                moved = tuple(blank if position == cell else position for position in positions)
+                child, childCost = (moved, cell), cost + 1
+            else:
+                child, childCost = (positions, cell), cost
+            if childCost < distance.get(child, UNSEEN):
+                distance[child] = childCost
+                if childCost == cost:
+                    frontier.appendleft(child)
+                else:
+                    frontier.append(child)
+    return table
+
+def patternDatabasePath(pattern):
+    return os.path.join(PATTERN_DATABASE_DIRECTORY,
+                        'eightpuzzle_pdb_%s.bin' % ''.join(str(tile) for tile in pattern))
+
+def patternDatabaseHeader(pattern):
+    "The bytes a saved table for 'pattern' starts with: magic, version and the pattern"
+    return PATTERN_DATABASE_MAGIC + bytes([PATTERN_DATABASE_VERSION, len(pattern)] + list(pattern))
+
+def readPatternDatabase(path, pattern):
+    """
+    Returns the table saved at 'path', or None if the file is missing or
+    its header or length does not match the table 'pattern' needs.
+    """
+    header = patternDatabaseHeader(pattern)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except IOError:
+        return None
+    if not data.startswith(header) or len(data) != len(header) + 9 ** (len(pattern) + 1):
+        return None
+    table = array('B')
+    table.frombytes(data[len(header):])
+    return table
+
+patternDatabases = {}
+
+def getPatternDatabase(pattern):
+    """
+    Returns the table for 'pattern', building it on first use.  Tables are
+    kept in memory for the life of the process and saved next to this file,
+    so later runs only read them back.  A missing, truncated or unwritable
+    file, or one saved for another pattern or by another version of the
+    table layout, just means the table is rebuilt (and the file rewritten).
+    """
+    pattern = tuple(pattern)
+    if pattern in patternDatabases:
+        return patternDatabases[pattern]
+    path = patternDatabasePath(pattern)
+    table = readPatternDatabase(path, pattern)
+    if table is None:
+        table = buildPatternDatabase(pattern)
+        try:
+            with open(path, 'wb') as f:
+                f.write(patternDatabaseHeader(pattern))
+                table.tofile(f)
+        except IOError:
+            pass
+    patternDatabases[pattern] = table
+    return table
+
+def patternDatabaseHeuristic(state, problem=None):
+    """
+    The sum of the additive pattern database values for PATTERNS, raised to
+    the linear conflict estimate where that is larger.  Both never
+    overestimate, so neither does their maximum.
+    """
+    positions = [0] * 9
+    for cell, tile in enumerate(state.tiles):
+        positions[tile] = cell
+    total = 0
+    for pattern in PATTERNS:
+        total += getPatternDatabase(pattern)[patternIndex([positions[tile] for tile in pattern], state.blank)]
+    return max(total, linearConflictHeuristic(state))
+
 EIGHT_PUZZLE_DATA = [[1, 0, 2, 3, 4, 5, 6, 7, 8],
                      [1, 7, 8, 2, 3, 4, 5, 6, 0],
                      [4, 3, 2, 7, 0, 5, 1, 6, 8],
@@ -262,7 +413,89 @@ def createRandomEightPuzzle(moves=100):
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
     return puzzle
 
+# Checking and comparing heuristics
+
+HEURISTICS = {'null': search.nullHeuristic, 'manhattan': eightPuzzleManhattan,
+              'linearConflict': linearConflictHeuristic, 'patternDatabase': patternDatabaseHeuristic}
+
+def exactDistances():
+    "Returns {tiles: fewest moves to the goal} for all 181,440 solvable puzzles"
+    goal = EightPuzzleState(GOAL_TILES)
+    distance = {goal.tiles: 0}
+    frontier = deque([goal])
+    while frontier:
+        state = frontier.popleft()
+        for move, cell in NEIGHBORS[state.blank]:
+            child = state.swapBlank(cell)
+            if child.tiles not in distance:
+                distance[child.tiles] = distance[state.tiles] + 1
+                frontier.append(child)
+    return distance
+
+def checkHeuristic(heuristic, instances=1000, seed=0, distance=None):
+    """
+    Checks 'heuristic' against the exact distances of every puzzle: it must
+    never overestimate, and no move may lower it by more than 1, the cost
+    of the move (consistency, which search.aStarSearch needs to return
+    optimal paths, as it never reopens a closed state).  Then A* is run on
+    'instances' puzzles drawn at random and its paths checked for length.
+    Returns a list of the failures found, empty if there are none.
+    """
+    if distance is None:
+        distance = exactDistances()
+    failures = []
+    h = dict((tiles, heuristic(EightPuzzleState(tiles))) for tiles in distance)
+    for tiles, d in distance.items():
+        if h[tiles] > d:
+            failures.append('%s: h = %d overestimates %d' % (tiles, h[tiles], d))
+        state = EightPuzzleState(tiles)
+        for move, cell in NEIGHBORS[state.blank]:
+            child = state.swapBlank(cell).tiles
+            if h[tiles] > h[child] + 1:
+                failures.append('%s -> %s: h drops from %d to %d' % (tiles, child, h[tiles], h[child]))
+    for tiles in random.Random(seed).sample(sorted(distance), instances):
+        path = search.aStarSearch(EightPuzzleSearchProblem(EightPuzzleState(tiles)), heuristic)
+        if len(path) != distance[tiles]:
+            failures.append('%s: A* found %d moves, the optimum is %d' % (tiles, len(path), distance[tiles]))
+    return failures
+
+def compareExpansions(heuristics, seeds, moves=100):
+    """
+    Runs A* with each named heuristic on the random puzzle made from each
+    seed and returns {name: [nodes expanded for each seed]}.
+    """
+    expanded = dict((name, []) for name in heuristics)
+    for seed in seeds:
+        random.seed(seed)
+        puzzle = createRandomEightPuzzle(moves)
+        for name in heuristics:
+            problem = EightPuzzleSearchProblem(puzzle)
+            search.aStarSearch(problem, HEURISTICS[name])
+            expanded[name].append(problem._expanded)
+    return expanded
+
 if __name__ == '__main__':
+    import optparse
+    parser = optparse.OptionParser('python eightpuzzle.py [--check] [--compare]')
+    parser.add_option('--check', dest='check', action='store_true', default=False,
+                      help='check the informed heuristics for admissibility and consistency')
+    parser.add_option('--compare', dest='compare', action='store_true', default=False,
+                      help='compare the nodes A* expands with each heuristic on seeds 0-9')
+    options, _ = parser.parse_args()
+    if options.check:
+        distance = exactDistances()
+        for name in ['manhattan', 'linearConflict', 'patternDatabase']:
+            failures = checkHeuristic(HEURISTICS[name], distance=distance)
+            print('%-16s %d failure(s)' % (name, len(failures)))
+            for failure in failures[:10]:
+                print('  ' + failure)
+    if options.compare:
+        expanded = compareExpansions(sorted(HEURISTICS), range(10))
+        for name in sorted(HEURISTICS):
+            print('%-16s total %7d  %s' % (name, sum(expanded[name]), expanded[name]))
+    if options.check or options.compare:
+        raise SystemExit
+
     puzzle = createRandomEightPuzzle(25)
     print('A random puzzle:')
     print(puzzle)
@@ -13,13 +13,24 @@
 
 
 from util import manhattanDistance
-from game import Grid
+from game import Grid, Directions, Actions
+import hashlib
 import os
 import random
-from functools import reduce
+import struct
+from collections import OrderedDict
+
+try:
+    import numpy
+    _NUMPY_ENABLED = True
+except:
+    _NUMPY_ENABLED = False
 
 VISIBILITY_MATRIX_CACHE = {}
 
+# Layout characters other than walls and food that processLayoutChar handles
+SPECIAL_CHARS = frozenset('oPG1234')
+
 class Layout:
     """
     A Layout manages the static information about the game board.
@@ -36,31 +47,39 @@ class Layout:
         self.processLayoutText(layoutText)
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
-        # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self):
         return self.numGhosts
 
+    @property
+    def visibility(self):
+        "The visibility reach tables, computed on first use (see initializeVisibilityMatrix)"
+        if getattr(self, '_visibility', None) is None:
+            self.initializeVisibilityMatrix()
+        return self._visibility
+
     def initializeVisibilityMatrix(self):
-        global VISIBILITY_MATRIX_CACHE
-        if reduce(str.__add__, self.layoutText) not in VISIBILITY_MATRIX_CACHE:
-            from game import Directions
-            vecs = [(-0.5,0), (0.5,0),(0,-0.5),(0,0.5)]
-            dirs = [Directions.NORTH, Directions.SOUTH, Directions.WEST, Directions.EAST]
-            vis = Grid(self.width, self.height, {Directions.NORTH:set(), Directions.SOUTH:set(), Directions.EAST:set(), Directions.WEST:set(), Directions.STOP:set()})
-            for x in range(self.width):
-                for y in range(self.height):
-                    if self.walls[x][y] == False:
-                        for vec, direction in zip(vecs, dirs):
-                            dx, dy = vec
-                            nextx, nexty = x + dx, y + dy
-                            while (nextx + nexty) != int(nextx) + int(nexty) or not self.walls[int(nextx)][int(nexty)] :
-                                vis[x][y][direction].add((nextx, nexty))
-                                nextx, nexty = x + dx, y + dy
-            self.visibility = vis
-            VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)] = vis
-        else:
-            self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
+        """
+        Fills self.visibility with the visibility reach of every cell: for each
+        direction, visibility[direction][x][y] is the number of open cells
+        seen from (x,y) looking that way before the first wall.  A ray sees
+        every half step up to half a cell short of that wall, which is all
+        isVisibleFrom needs, so the sets of visible points are never built.
+
+        The reach is the gap to the nearest wall along each row or column,
+        found with a reversed running minimum over the wall indices (in
+        NumPy when it is available).  Results are shared through
+        VISIBILITY_MATRIX_CACHE, keyed on the layout text.  Layouts only
+        call this the first time self.visibility is read, so searches that
+        never check visibility never pay for it.
+        """
+        key = '\n'.join(self.layoutText)
+        if key not in VISIBILITY_MATRIX_CACHE:
+            if _NUMPY_ENABLED:
+                VISIBILITY_MATRIX_CACHE[key] = visibilityReachNumpy(self.walls)
+            else:
+                VISIBILITY_MATRIX_CACHE[key] = visibilityReach(self.walls)
+        self._visibility = VISIBILITY_MATRIX_CACHE[key]
 
     def isWall(self, pos):
         x, col = pos
@@ -84,8 +103,15 @@ class Layout:
         return pos
 
     def isVisibleFrom(self, ghostPos, pacPos, pacDirection):
+        if pacDirection not in self.visibility: return False
         row, col = [int(x) for x in pacPos]
-        return ghostPos in self.visibility[row][col][pacDirection]
+        dx, dy = Actions.directionToVector(pacDirection)
+        gx, gy = ghostPos
+        # The ghost must be on the ray, a whole number of half steps along it
+        if dx == 0 and gx != row or dy == 0 and gy != col: return False
+        steps = 2 * ((gx - row) * dx + (gy - col) * dy)
+        if steps != int(steps): return False
+        return 0 < steps <= 2 * self.visibility[pacDirection][row][col] + 1
 
     def __str__(self):
         return "\n".join(self.layoutText)
@@ -107,10 +133,23 @@ class Layout:
         Other characters are ignored.
         """
         maxY = self.height - 1
+        # The first row sets the width.  Characters past it are ignored, as
+        # they always were (capsuleClassic.lay has one), but a shorter row
+        # would leave its end of the board undefined.
+        for y, row in enumerate(layoutText):
+            if len(row) < self.width:
+                raise Exception('Layout row %d is %d characters wide, narrower than the first row (%d)'
+                                % (y + 1, len(row), self.width))
+        columns = list(zip(*reversed(layoutText)))
+        self.walls.data = [list(map('%'.__eq__, column)) for column in columns]
+        self.food.data = [list(map('.'.__eq__, column)) for column in columns]
+        # Only capsules and agents are left, and they are rare
         for y in range(self.height):
+            row = layoutText[maxY - y]
+            if SPECIAL_CHARS.isdisjoint(row): continue
             for x in range(self.width):
-                layoutChar = layoutText[maxY - y][x]
-                self.processLayoutChar(x, y, layoutChar)
+                if row[x] in SPECIAL_CHARS:
+                    self.processLayoutChar(x, y, row[x])
         self.agentPositions.sort()
         self.agentPositions = [ ( i == 0, pos) for i, pos in self.agentPositions]
 
@@ -129,22 +168,194 @@ class Layout:
         elif layoutChar in  ['1', '2', '3', '4']:
             self.agentPositions.append( (int(layoutChar), (x,y)))
             self.numGhosts += 1
+
+VISIBILITY_DIRECTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+
+def visibilityReachNumpy(walls):
+    "The visibility reach of every cell as {direction: int array indexed [x][y]}"
+    blocked = numpy.array(walls.data, dtype=bool)
+    reach = {}
+    for direction in VISIBILITY_DIRECTIONS:
+        dx, dy = Actions.directionToVector(direction)
+        axis = 0 if dx else 1
+        # Flip the grid so the ray always looks towards increasing indices
+        grid = blocked if dx + dy > 0 else numpy.flip(blocked, axis)
+        size = grid.shape[axis]
+        shape = [1, 1]
+        shape[axis] = size
+        indices = numpy.arange(size).reshape(shape)
+        # nextWall[i] is the index of the first wall at or beyond i
+        wallIndex = numpy.where(grid, indices, size)
+        nextWall = numpy.flip(numpy.minimum.accumulate(numpy.flip(wallIndex, axis), axis=axis), axis)
+        beyond = numpy.full(grid.shape, size)
+        if axis == 0:
+            beyond[:-1, :] = nextWall[1:, :]
+        else:
+            beyond[:, :-1] = nextWall[:, 1:]
+        gap = beyond - indices - 1
+        reach[direction] = (gap if dx + dy > 0 else numpy.flip(gap, axis)).tolist()
+    return reach
+
+def visibilityReach(walls):
+    "visibilityReachNumpy without NumPy: one pass along each row and column per direction"
+    reach = {}
+    for direction in VISIBILITY_DIRECTIONS:
+        dx, dy = Actions.directionToVector(direction)
+        dx, dy = int(dx), int(dy)
+        gap = [[0] * walls.height for x in range(walls.width)]
+        xs = range(walls.width) if dx <= 0 else range(walls.width - 1, -1, -1)
+        ys = range(walls.height) if dy <= 0 else range(walls.height - 1, -1, -1)
+        # Visit cells so the neighbour in 'direction' is always done first
+        for x in xs:
+            for y in ys:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < walls.width and 0 <= ny < walls.height and not walls[nx][ny]:
+                    gap[x][y] = gap[nx][ny] + 1
+        reach[direction] = gap
+    return reach
+
+##################################################
+# PARSED LAYOUT CACHE AND COMPACT BINARY LAYOUTS #
+##################################################
+
+# Parsed layouts by (absolute path, modification time), least recently used
+# first.  Callers share the cached Layout, so it must not be modified; a
+# GameState copies the food it eats.
+LAYOUT_CACHE = OrderedDict()
+LAYOUT_CACHE_SIZE = 64
+
+# When set, layouts are also saved in a compact binary form in this
+# directory and read back from there while the .lay file is unchanged.
+# Each file is named for the full path of its .lay file and records its
+# modification time.
+BINARY_CACHE_DIRECTORY = None
+
 def getLayout(name, back = 2):
-    if name.endswith('.lay'):
-        layout = tryToLoad('layouts/' + name)
-        if layout == None: layout = tryToLoad(name)
-    else:
-        layout = tryToLoad('layouts/' + name + '.lay')
-        if layout == None: layout = tryToLoad(name + '.lay')
-    if layout == None and back >= 0:
-        curdir = os.path.abspath('.')
-        os.chdir('..')
-        layout = getLayout(name, back -1)
-        os.chdir(curdir)
-    return layout
+    """
+    Returns the Layout called 'name' (with or without .lay) from layouts/ or
+    the current directory, or from up to 'back' + 1 directories above it.
+    """
+    fileNames = [os.path.join('layouts', name), name] if name.endswith('.lay') \
+        else [os.path.join('layouts', name + '.lay'), name + '.lay']
+    directory = os.path.abspath('.')
+    for level in range(back + 2):
+        for fileName in fileNames:
+            layout = tryToLoad(os.path.join(directory, fileName))
+            if layout != None: return layout
+        directory = os.path.dirname(directory)
+    return None
 
 def tryToLoad(fullname):
-    if(not os.path.exists(fullname)): return None
-    f = open(fullname)
-    try: return Layout([line.strip() for line in f])
-    finally: f.close()
+    """
+    Returns the Layout in the file 'fullname', or None if there is no such
+    file.  Parsed layouts are cached until their file changes.
+    """
+    try:
+        stat = os.stat(fullname)
+    except OSError:
+        return None
+    key = (os.path.abspath(fullname), stat.st_mtime_ns)
+    if key in LAYOUT_CACHE:
+        LAYOUT_CACHE.move_to_end(key)
+        return LAYOUT_CACHE[key]
+    layout = None
+    if BINARY_CACHE_DIRECTORY != None:
+        layout = loadBinaryLayout(binaryLayoutPath(fullname), stat.st_mtime_ns)
+    if layout == None:
+        f = open(fullname)
+        try: layout = Layout([line.strip() for line in f])
+        finally: f.close()
+        if BINARY_CACHE_DIRECTORY != None:
+            saveBinaryLayout(layout, binaryLayoutPath(fullname), stat.st_mtime_ns)
+    LAYOUT_CACHE[key] = layout
+    if len(LAYOUT_CACHE) > LAYOUT_CACHE_SIZE:
+        LAYOUT_CACHE.popitem(last=False)
+    return layout
+
+def binaryLayoutPath(fullname):
+    "The binary cache file for 'fullname': its name plus a digest of its absolute path"
+    base = os.path.splitext(os.path.basename(fullname))[0]
+    digest = hashlib.sha1(os.path.abspath(fullname).encode()).hexdigest()[:16]
+    return os.path.join(BINARY_CACHE_DIRECTORY, '%s-%s.layb' % (base, digest))
+
+# Binary layouts are: BINARY_HEADER (magic, source mtime, width, height,
+# number of capsules, number of agents, length of the text), the walls and
+# the food as bit-packed ints (cell (x,y) is bit x * height + y, as in
+# game.BitGrid), the capsules and agents as BINARY_POSITION records, and
+# the layout text.
+BINARY_MAGIC = b'LAYB0001'
+BINARY_HEADER = struct.Struct('<8sqHHHHI')
+BINARY_POSITION = struct.Struct('<?HH')
+
+def packGrid(grid):
+    bits = 0
+    for x, column in enumerate(grid.data):
+        if any(column):
+            bits |= int(''.join('1' if value else '0' for value in reversed(column)), 2) << (x * grid.height)
+    return bits.to_bytes((grid.width * grid.height + 7) // 8, 'little')
+
+def unpackGrid(data, width, height):
+    bits = int.from_bytes(data, 'little')
+    mask = (1 << height) - 1
+    grid = Grid(width, height)
+    # Each column is 'height' bits; its binary digits, lowest first, are the cells
+    digits = '0%db' % height
+    grid.data = [list(map('1'.__eq__, format(bits >> (x * height) & mask, digits)[::-1]))
+                 for x in range(width)]
+    return grid
+
+def layoutToBytes(layout, mtime):
+    "Returns the compact binary form of 'layout', read from a file with mtime"
+    text = '\n'.join(layout.layoutText).encode()
+    parts = [BINARY_HEADER.pack(BINARY_MAGIC, mtime, layout.width, layout.height,
+                                len(layout.capsules), len(layout.agentPositions), len(text)),
+             packGrid(layout.walls), packGrid(layout.food)]
+    parts += [BINARY_POSITION.pack(False, x, y) for x, y in layout.capsules]
+    parts += [BINARY_POSITION.pack(isPacman, x, y) for isPacman, (x, y) in layout.agentPositions]
+    parts.append(text)
+    return b''.join(parts)
+
+def layoutFromBytes(data, mtime=None):
+    """
+    Rebuilds a Layout from layoutToBytes, or returns None if the data is
+    not a binary layout or (when 'mtime' is given) came from another
+    version of the file.
+    """
+    if len(data) < BINARY_HEADER.size:
+        return None
+    magic, stored, width, height, numCapsules, numAgents, textLength = BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC or (mtime != None and stored != mtime):
+        return None
+    gridSize = (width * height + 7) // 8
+    offset = BINARY_HEADER.size
+    layout = Layout.__new__(Layout)
+    layout.width, layout.height = width, height
+    layout.walls = unpackGrid(data[offset:offset + gridSize], width, height)
+    layout.food = unpackGrid(data[offset + gridSize:offset + 2 * gridSize], width, height)
+    offset += 2 * gridSize
+    positions = []
+    for i in range(numCapsules + numAgents):
+        positions.append(BINARY_POSITION.unpack_from(data, offset))
+        offset += BINARY_POSITION.size
+    layout.capsules = [(x, y) for _, x, y in positions[:numCapsules]]
+    layout.agentPositions = [(isPacman, (x, y)) for isPacman, x, y in positions[numCapsules:]]
+    layout.numGhosts = len([isPacman for isPacman, _ in layout.agentPositions if not isPacman])
+    layout.layoutText = data[offset:offset + textLength].decode().split('\n')
+    layout.totalFood = layout.food.count()
+    return layout
+
+def saveBinaryLayout(layout, path, mtime):
+    "Writes the binary form of 'layout'; a directory that cannot be written is skipped"
+    try:
+        with open(path, 'wb') as f:
+            f.write(layoutToBytes(layout, mtime))
+    except IOError:
+        pass
+
+def loadBinaryLayout(path, mtime):
+    "Returns the binary layout at 'path' if it is there and current, else None"
+    try:
+        with open(path, 'rb') as f:
+            return layoutFromBytes(f.read(), mtime)
+    except (IOError, struct.error, UnicodeDecodeError):
+        return None
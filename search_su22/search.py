@@ -18,6 +18,11 @@ Pacman agents (in searchAgents.py).
 """
 
 import util
+import heapq
+import json
+import time
+from array import array
+from collections import OrderedDict
 
 class SearchProblem:
     """
@@ -72,22 +77,211 @@ def tinyMazeSearch(problem):
     w = Directions.WEST
     return  [s, s, w, s, w, w, s, w]
 
-def generic_search(problem, fringe, fringe_op):
+class SearchNodeStore:
+    """
+    Stores every search node generated by generic_search as a parent index
+    and an action id in two compact arrays, so a fringe entry only carries an
+    integer instead of a copy of the whole path.  The list of actions is
+    rebuilt by walking the parent pointers once a goal is popped.
+    """
+    def __init__(self):
+        self.parents = array('l')
+        self.actionIds = array('l')
+        self.actions = []       # action id -> action
+        self.actionIndex = {}   # action -> action id
+
+    def __len__(self):
+        return len(self.parents)
+
+    def addRoot(self):
+        "Adds the start node (no parent, no action) and returns its index"
+        return self.addNode(-1, None)
+
+    def addNode(self, parent, action):
+        "Records a node reached from node 'parent' via 'action' and returns its index"
+        if action is None:
+            actionId = -1
+        else:
+            actionId = self.actionIndex.get(action)
+            if actionId is None:
+                actionId = len(self.actions)
+                self.actionIndex[action] = actionId
+                self.actions.append(action)
+        self.parents.append(parent)
+        self.actionIds.append(actionId)
+        return len(self.parents) - 1
+
+    def getPath(self, index):
+        "Returns the list of actions leading from the root to node 'index'"
+        path = []
+        parents, actionIds, actions = self.parents, self.actionIds, self.actions
+        while parents[index] != -1:
+            path.append(actions[actionIds[index]])
+            index = parents[index]
+        path.reverse()
+        return path
+
+class SearchStats:
+    """
+    Counters collected by generic_search for one search, so algorithms and
+    heuristics can be compared on the same problem:
+
+      pushed, popped     fringe operations
+      duplicatesSkipped  popped nodes that were already closed, plus pushes
+                         avoided by prune=True
+      peakFringe         largest number of nodes on the fringe at once
+      heuristicCalls     heuristic evaluations (astar only) ...
+      heuristicTime      ... and the seconds spent in them
+      memoHits, memoMisses  lookups in the HeuristicMemo (astar only)
+      wallTime           seconds from the first push to the return
+      expanded           problem._expanded when the search returned
+      pathLength         number of actions returned (None if no path)
+      scanned            cells stepped through by jumps (jumpPointSearch only)
+
+    The last search run on a problem is left in problem._searchStats.
+    """
+    fields = ['algorithm', 'pushed', 'popped', 'duplicatesSkipped', 'peakFringe',
+              'heuristicCalls', 'heuristicTime', 'memoHits', 'memoMisses',
+              'wallTime', 'expanded', 'pathLength', 'scanned']
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.pushed = 0
+        self.popped = 0
+        self.duplicatesSkipped = 0
+        self.peakFringe = 0
+        self.heuristicCalls = 0
+        self.heuristicTime = 0.0
+        self.memoHits = 0
+        self.memoMisses = 0
+        self.wallTime = 0.0
+        self.expanded = None
+        self.pathLength = None
+        self.scanned = 0
+
+    def __repr__(self):
+        return 'SearchStats(%s)' % ', '.join('%s=%r' % (name, getattr(self, name)) for name in self.fields)
+
+    def asDict(self):
+        return dict((name, getattr(self, name)) for name in self.fields)
+
+    def timedHeuristic(self, heuristic):
+        "Wraps 'heuristic' so that its calls are counted and timed in these stats"
+        clock = time.perf_counter
+        def timed(state, problem=None):
+            begin = clock()
+            value = heuristic(state, problem)
+            self.heuristicTime += clock() - begin
+            self.heuristicCalls += 1
+            return value
+        return timed
+
+    def writeJSONLine(self, fileName, **extra):
+        """
+        Appends these stats, together with any 'extra' fields (layout name,
+        heuristic, ...), to fileName as a single line of JSON.
+        """
+        record = dict(extra)
+        record.update(self.asDict())
+        with open(fileName, 'a') as f:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+
+class HeuristicMemo:
+    """
+    A least recently used cache of heuristic values keyed on the search
+    state, holding at most 'size' states.  Calling the memo looks the state
+    up and only calls the wrapped heuristic on a miss, so a state pushed
+    many times is evaluated once while it stays in the cache.
+
+    The memo belongs to a single search: values are keyed on the state
+    alone, so it must not be shared between problems.
+    """
+    def __init__(self, heuristic, size):
+        self.heuristic = heuristic
+        self.size = size
+        self.values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, state, problem=None):
+        values = self.values
+        value = values.get(state)
+        if value is not None:
+            self.hits += 1
+            values.move_to_end(state)
+            return value
+        self.misses += 1
+        value = self.heuristic(state, problem)
+        values[state] = value
+        if len(values) > self.size:
+            values.popitem(last=False)
+        return value
+
+def generic_search(problem, fringe, fringe_op, prune=False, stats=None):
+    """
+    Graph search shared by dfs, bfs, ucs and astar.  Fringe entries are
+    (state, cost, node) triples where 'node' is an index into a
+    SearchNodeStore; the action list is only rebuilt for the goal.
+
+    With prune=True a successor is dropped before it is pushed if it is
+    already closed or if it has already been pushed with a cost no greater
+    than the new one.  This is only safe for cost-ordered fringes (ucs, and
+    astar with a consistent heuristic).  The number of pushes avoided is
+    recorded in problem._pushesAvoided as {'closed': n, 'bestCost': m}.
+
+    Counters for the search are collected in 'stats' (a new SearchStats if
+    none is given) and left in problem._searchStats.
+    """
+    if stats is None:
+        stats = SearchStats('generic_search')
+    problem._searchStats = stats
+    startTime = time.perf_counter()
+    pushed, popped, duplicates, peakFringe = 1, 0, 0, 1
+
     closed = set()
-    start = (problem.getStartState(), 0, [])
+    nodes = SearchNodeStore()
+    startState = problem.getStartState()
+    start = (startState, 0, nodes.addRoot())
     fringe_op(fringe, start, 0)
+    bestCost = {startState: 0}
+    closedSkips, costSkips = 0, 0
 
+    path = None
     while not fringe.isEmpty():
-        (node, cost, path) = fringe.pop()
+        (node, cost, index) = fringe.pop()
+        popped += 1
         if problem.isGoalState(node) :
-            return path
+            path = nodes.getPath(index)
+            break
         if not node in closed :
             closed.add(node)
             for child_node, child_action, child_cost in problem.getSuccessors(node):
                 new_cost = cost + child_cost
-                new_path = path + [child_action]
-                new_state = (child_node, new_cost, new_path)
+                if prune:
+                    if child_node in closed:
+                        closedSkips += 1
+                        continue
+                    best = bestCost.get(child_node)
+                    if best is not None and best <= new_cost:
+                        costSkips += 1
+                        continue
+                    bestCost[child_node] = new_cost
+                new_state = (child_node, new_cost, nodes.addNode(index, child_action))
                 fringe_op(fringe, new_state, new_cost)
+                pushed += 1
+            if pushed - popped > peakFringe:
+                peakFringe = pushed - popped
+        else:
+            duplicates += 1
+
+    if prune:
+        problem._pushesAvoided = {'closed': closedSkips, 'bestCost': costSkips}
+    stats.pushed, stats.popped, stats.peakFringe = pushed, popped, peakFringe
+    stats.duplicatesSkipped = duplicates + closedSkips + costSkips
+    stats.wallTime = time.perf_counter() - startTime
+    stats.expanded = getattr(problem, '_expanded', None)
+    stats.pathLength = None if path is None else len(path)
+    return path
 
 
 def depthFirstSearch(problem):
@@ -141,7 +335,7 @@ def depthFirstSearch(problem):
     def fringe_op(fringe, state, cost):
         fringe.push(state)
         
-    return generic_search(problem, fringe, fringe_op)
+    return generic_search(problem, fringe, fringe_op, stats=SearchStats('depthFirstSearch'))
     #util.raiseNotDefined()
 
 def breadthFirstSearch(problem):
@@ -151,15 +345,20 @@ def breadthFirstSearch(problem):
         # print(1)
         fringe.push(state)
         
-    return generic_search(problem, fringe, fringe_op)
+    return generic_search(problem, fringe, fringe_op, stats=SearchStats('breadthFirstSearch'))
+
+def uniformCostSearch(problem: SearchProblem, prune=False):
+    """
+    Search the node of least total cost first.
 
-def uniformCostSearch(problem: SearchProblem):
-    """Search the node of least total cost first."""
+    prune=True filters successors against the closed set and the best known
+    cost before pushing them (see generic_search).
+    """
     fringe = util.PriorityQueue()
     def fringe_op(fringe, state, cost):
         fringe.push(state, cost)
         
-    return generic_search(problem, fringe, fringe_op)
+    return generic_search(problem, fringe, fringe_op, prune, SearchStats('uniformCostSearch'))
 
 def nullHeuristic(state, problem=None):
     """
@@ -168,14 +367,530 @@ def nullHeuristic(state, problem=None):
     """
     return 0
 
-def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic):
-    """Search the node that has the lowest combined cost and heuristic first."""
+def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic, prune=False, memoSize=0):
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+
+    prune=True filters successors against the closed set and the best known
+    cost before pushing them (see generic_search); the heuristic must be
+    consistent for this to keep the returned path optimal.
+
+    With memoSize > 0 heuristic values are cached per state in a
+    HeuristicMemo of that many states (e.g. -a memoSize=65536 on a
+    SearchAgent); by default the heuristic is called on every push.
+    """
+    stats = SearchStats('aStarSearch')
+    evaluate = stats.timedHeuristic(heuristic)
+    memo = None
+    if memoSize > 0:
+        memo = evaluate = HeuristicMemo(evaluate, memoSize)
     fringe = util.PriorityQueue()
     def fringe_op(fringe, state, cost):
-        new_cost = cost + heuristic(state[0], problem)
+        new_cost = cost + evaluate(state[0], problem)
         fringe.push(state, new_cost)
         
-    return generic_search(problem, fringe, fringe_op)
+    path = generic_search(problem, fringe, fringe_op, prune, stats)
+    if memo is not None:
+        stats.memoHits, stats.memoMisses = memo.hits, memo.misses
+    return path
+
+class BackwardProblem:
+    """
+    A view of a SearchProblem whose goal is the original start state, so
+    that heuristics written against problem.goal estimate the distance back
+    to the start during the backward half of bidirectionalSearch.  Every
+    other attribute is read from the wrapped problem.
+    """
+    def __init__(self, problem):
+        self.problem = problem
+        self.goal = problem.getStartState()
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+def bidirectionalSearch(problem: SearchProblem, heuristic=nullHeuristic):
+    """
+    Front-to-end bidirectional search: a forward search from the start and a
+    backward search from the goal.  With nullHeuristic this is bidirectional
+    uniform cost search (and bidirectional BFS on unit costs); otherwise it
+    is bidirectional A*.
+
+    The problem must have a single goal and provide getGoalState() and
+    getPredecessors(state).  getPredecessors returns (predecessor, action,
+    stepCost) triples where 'action' leads from predecessor to state.
+
+    The heuristic is applied through average potentials: with hf the
+    estimate to the goal and hb the estimate back to the start, the forward
+    fringe is ordered by g + (hf - hb) / 2 and the backward one by
+    g + (hb - hf) / 2.  For a consistent heuristic both are Dijkstra on
+    non-negative reduced costs, so the search can stop as soon as the two
+    fringe tops add up to the best meeting cost found so far.
+    """
+    if not hasattr(problem, 'getPredecessors') or not hasattr(problem, 'getGoalState'):
+        raise AttributeError('bidirectionalSearch needs a problem with getPredecessors and getGoalState.')
+    start, goal = problem.getStartState(), problem.getGoalState()
+    if start == goal:
+        return []
+
+    backward = BackwardProblem(problem)
+    def potential(state):
+        return (heuristic(state, problem) - heuristic(state, backward)) / 2.0
+
+    directions = [
+        (problem.getSuccessors, 1, SearchNodeStore()),
+        (problem.getPredecessors, -1, SearchNodeStore())]
+    fringes = [[], []]
+    best = [{}, {}]      # state -> (g, node index), per direction
+    closed = [set(), set()]
+    count = 0
+    for side, state in ((0, start), (1, goal)):
+        index = directions[side][2].addRoot()
+        best[side][state] = (0, index)
+        heapq.heappush(fringes[side], (directions[side][1] * potential(state), count, state, 0, index))
+        count += 1
+
+    mu, meeting = float('inf'), None
+    while fringes[0] and fringes[1]:
+        topF, topB = fringes[0][0][0], fringes[1][0][0]
+        if topF + topB >= mu:
+            break
+
+        side = 0 if topF <= topB else 1
+        expand, sign, nodes = directions[side]
+        _, _, state, cost, index = heapq.heappop(fringes[side])
+        if state in closed[side] or best[side][state][0] < cost:
+            continue
+        closed[side].add(state)
+        other = best[1 - side]
+        for child, action, stepCost in expand(state):
+            newCost = cost + stepCost
+            known = best[side].get(child)
+            if known is not None and known[0] <= newCost:
+                continue
+            childIndex = nodes.addNode(index, action)
+            best[side][child] = (newCost, childIndex)
+            if child in other and newCost + other[child][0] < mu:
+                mu = newCost + other[child][0]
+                meeting = (childIndex, other[child][1]) if side == 0 else (other[child][1], childIndex)
+            heapq.heappush(fringes[side], (newCost + sign * potential(child), count, child, newCost, childIndex))
+            count += 1
+
+    if meeting is None:
+        return None
+    problem.isGoalState(goal) # Lets the display draw the expanded cells
+    forwardPath = directions[0][2].getPath(meeting[0])
+    backwardPath = directions[1][2].getPath(meeting[1])
+    backwardPath.reverse()
+    return forwardPath + backwardPath
+
+
+def jumpPointSearch(problem: SearchProblem):
+    """
+    Jump point search for a single goal on a 4-connected grid where every
+    step costs 1, such as PositionSearchProblem with its default costFn.
+    The problem must provide 'walls' (a Grid), getStartState() returning a
+    position and getGoalState().
+
+    Of the many equally short grid paths, only canonical ones are searched:
+    a path may turn from horizontal to vertical anywhere, but may turn from
+    vertical back to horizontal only where a wall forces it, i.e. where the
+    side cell one step back is blocked.  Any shortest path can be rewritten
+    into this form by moving its horizontal steps earlier, so nothing is
+    lost.  Moving vertically, the search jumps to the next goal or forced
+    turn; moving horizontally, it stops where a vertical jump from the
+    current cell finds one.  A* with the Manhattan distance then runs over
+    these jump points only.
+
+    problem._expanded counts the jump points expanded, and
+    problem._searchStats.scanned the cells the jumps stepped through.  As
+    getSuccessors is never called, a caller that limits the search (see
+    searchBenchmark.limitExpansions) may set problem._checkBudget: it is
+    called with the jump points expanded plus the cells scanned so far at
+    every step of a jump, and raises to stop the search.
+    """
+    from game import Actions
+    walls = problem.walls
+    start, goal = problem.getStartState(), problem.getGoalState()
+    stats = SearchStats('jumpPointSearch')
+    problem._searchStats = stats
+    startTime = time.perf_counter()
+    scanned = [0]
+    checkBudget = getattr(problem, '_checkBudget', None)
+
+    def step():
+        scanned[0] += 1
+        if checkBudget is not None:
+            checkBudget(getattr(problem, '_expanded', 0) + scanned[0])
+
+    def isOpen(x, y):
+        return 0 <= x < walls.width and 0 <= y < walls.height and not walls[x][y]
+
+    def forcedTurns(x, y, dy):
+        "Horizontal directions a vertical move into (x, y) is forced to try"
+        return [(dx, 0) for dx in (1, -1) if isOpen(x + dx, y) and not isOpen(x + dx, y - dy)]
+
+    def jumpVertical(x, y, dy):
+        while True:
+            x, y = x, y + dy
+            step()
+            if not isOpen(x, y):
+                return None
+            if (x, y) == goal or forcedTurns(x, y, dy):
+                return (x, y)
+
+    def jumpHorizontal(x, y, dx):
+        while True:
+            x = x + dx
+            step()
+            if not isOpen(x, y):
+                return None
+            if (x, y) == goal or jumpVertical(x, y, 1) or jumpVertical(x, y, -1):
+                return (x, y)
+
+    def directionsFrom(position, direction):
+        x, y = position
+        if direction is None:
+            return [(1, 0), (-1, 0), (0, 1), (0, -1)]
+        dx, dy = direction
+        if dy == 0:
+            return [direction, (0, 1), (0, -1)]
+        return [direction] + forcedTurns(x, y, dy)
+
+    def manhattan(position):
+        return abs(position[0] - goal[0]) + abs(position[1] - goal[1])
+
+    parents = {start: None}
+    best = {start: 0}
+    fringe = [(manhattan(start), 0, 0, start, None)]
+    count = 1
+    stats.pushed = 1
+    found = start == goal
+    while fringe and not found:
+        stats.peakFringe = max(stats.peakFringe, len(fringe))
+        _, _, cost, position, direction = heapq.heappop(fringe)
+        stats.popped += 1
+        if best[position] < cost:
+            continue
+        if position == goal:
+            found = True
+            break
+        problem._expanded = getattr(problem, '_expanded', 0) + 1
+        for dx, dy in directionsFrom(position, direction):
+            if dy == 0:
+                jumpPoint = jumpHorizontal(position[0], position[1], dx)
+            else:
+                jumpPoint = jumpVertical(position[0], position[1], dy)
+            if jumpPoint is None:
+                continue
+            newCost = cost + abs(jumpPoint[0] - position[0]) + abs(jumpPoint[1] - position[1])
+            if jumpPoint in best and best[jumpPoint] <= newCost:
+                continue
+            best[jumpPoint] = newCost
+            parents[jumpPoint] = position
+            heapq.heappush(fringe, (newCost + manhattan(jumpPoint), count, newCost, jumpPoint, (dx, dy)))
+            count += 1
+            stats.pushed += 1
+
+    stats.wallTime = time.perf_counter() - startTime
+    stats.expanded = getattr(problem, '_expanded', None)
+    stats.scanned = scanned[0]
+    if not found:
+        return None
+    path = []
+    position = goal
+    while parents[position] is not None:
+        parent = parents[position]
+        length = abs(position[0] - parent[0]) + abs(position[1] - parent[1])
+        step = ((position[0] - parent[0]) // length, (position[1] - parent[1]) // length)
+        path += [Actions.vectorToDirection(step)] * length
+        position = parent
+    path.reverse()
+    stats.pathLength = len(path)
+    problem.isGoalState(goal) # Lets the display draw the expanded cells
+    return path
+
+
+def costBoundedSearch(problem, heuristic, bound, table, tableSize, memory):
+    """
+    One iteration of IDA*: a depth-first search that only follows nodes with
+    g + h <= bound.  Returns (path, bound) if a goal is reached, otherwise
+    (None, nextBound) where nextBound is the smallest f value that exceeded
+    the bound.
+
+    Only the current path is kept (one successor list per level), plus
+    'table', a transposition table of the cheapest g seen for each state in
+    this iteration that never grows beyond tableSize entries (pass None to
+    disable it).  The peak path length and table size are recorded in
+    'memory'.
+    """
+    start = problem.getStartState()
+    f = heuristic(start, problem)
+    if f > bound:
+        return None, f
+    if problem.isGoalState(start):
+        return [], bound
+
+    path, onPath = [], set([start])
+    stack = [(start, 0, iter(problem.getSuccessors(start)))]
+    nextBound = float('inf')
+    while stack:
+        state, cost, children = stack[-1]
+        for child, action, stepCost in children:
+            if child in onPath:
+                continue
+            childCost = cost + stepCost
+            if table is not None:
+                known = table.get(child)
+                if known is not None and known <= childCost:
+                    continue
+                if known is not None or len(table) < tableSize:
+                    table[child] = childCost
+            f = childCost + heuristic(child, problem)
+            if f > bound:
+                nextBound = min(nextBound, f)
+                continue
+            if problem.isGoalState(child):
+                return path + [action], bound
+            path.append(action)
+            onPath.add(child)
+            stack.append((child, childCost, iter(problem.getSuccessors(child))))
+            memory['peakDepth'] = max(memory['peakDepth'], len(stack))
+            break
+        else:
+            stack.pop()
+            onPath.discard(state)
+            if path:
+                path.pop()
+        if table is not None:
+            memory['tableEntries'] = max(memory['tableEntries'], len(table))
+    return None, nextBound
+
+def iterativeDeepeningAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, tableSize=0):
+    """
+    Iterative deepening A* (IDA*): repeated cost-bounded depth-first searches
+    whose bound grows to the smallest f value that was cut off last time.
+    Memory is O(depth), at the price of re-expanding nodes in every
+    iteration and along different paths to the same state.  The returned
+    path is optimal for an admissible heuristic.
+
+    tableSize > 0 adds a transposition table of at most that many states,
+    which skips a state reached again at no lower cost within an iteration.
+
+    The number of iterations, the deepest path held and the largest table
+    are recorded in problem._searchMemory.
+    """
+    memory = {'iterations': 0, 'peakDepth': 1, 'tableEntries': 0}
+    problem._searchMemory = memory
+    bound = heuristic(problem.getStartState(), problem)
+    while bound != float('inf'):
+        memory['iterations'] += 1
+        table = {} if tableSize > 0 else None
+        path, bound = costBoundedSearch(problem, heuristic, bound, table, tableSize, memory)
+        if path is not None:
+            return path
+    return None
+
+def idaStarTableSearch(problem: SearchProblem, heuristic=nullHeuristic, tableSize=65536):
+    "IDA* with a transposition table limited to tableSize states (see iterativeDeepeningAStarSearch)"
+    return iterativeDeepeningAStarSearch(problem, heuristic, tableSize)
+
+def depthFirstBranchAndBound(problem: SearchProblem, heuristic=nullHeuristic, tableSize=65536):
+    """
+    Depth-first branch and bound: a depth-first search that keeps the
+    cheapest solution found so far and prunes every node whose g + h cannot
+    beat it.  Children are tried in order of g + h so good solutions are
+    found early.  It returns the optimal path for an admissible heuristic,
+    but unlike IDA* it never re-expands a node to reach a new bound.
+
+    Like idaStarTableSearch it keeps the cheapest g of at most tableSize
+    states, which keeps it from re-exploring the same states along
+    different paths; tableSize=0 leaves only the O(depth) path in memory.
+    """
+    memory = {'iterations': 1, 'peakDepth': 1, 'tableEntries': 0}
+    problem._searchMemory = memory
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return []
+
+    def orderedChildren(state, cost):
+        children = []
+        for child, action, stepCost in problem.getSuccessors(state):
+            childCost = cost + stepCost
+            children.append((childCost + heuristic(child, problem), childCost, child, action))
+        children.sort(key=lambda child: child[:2])
+        return iter(children)
+
+    best, bestPath = float('inf'), None
+    table = {start: 0}
+    path, onPath = [], set([start])
+    stack = [(start, orderedChildren(start, 0))]
+    while stack:
+        state, children = stack[-1]
+        descended = False
+        for f, childCost, child, action in children:
+            if f >= best:
+                break # Children are sorted, so none of the rest can do better
+            if child in onPath:
+                continue
+            known = table.get(child)
+            if known is not None and known <= childCost:
+                continue
+            if known is not None or len(table) < tableSize:
+                table[child] = childCost
+            if problem.isGoalState(child):
+                best, bestPath = childCost, path + [action]
+                continue
+            path.append(action)
+            onPath.add(child)
+            stack.append((child, orderedChildren(child, childCost)))
+            memory['peakDepth'] = max(memory['peakDepth'], len(stack))
+            descended = True
+            break
+        if not descended:
+            stack.pop()
+            onPath.discard(state)
+            if path:
+                path.pop()
+    memory['tableEntries'] = len(table)
+    return bestPath
+
+
+def anytimeWeightedAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, weight=3.0,
+                               weightStep=0.5, timeBudget=None, onSolution=None):
+    """
+    Anytime repairing A* (ARA*).  A first path is found quickly by weighted
+    A*, ordering the fringe by g + weight * h, which costs at most 'weight'
+    times the optimum for an admissible heuristic.  The weight is then
+    lowered by weightStep at a time, down to 1, and each round improves the
+    path, reusing the costs already found: only states whose cost dropped
+    since they were expanded (the INCONS list of ARA*) are searched again.
+
+    Rounds stop once timeBudget seconds have passed since the call (the
+    first path is always completed); with no budget they run until the path
+    is optimal.  Each better path is reported as onSolution(path, cost,
+    bound), where bound is the proven suboptimality: the path costs at most
+    bound times the optimum.  The list of (cost, bound, seconds) for every
+    path found is left in problem._anytimeSolutions.
+    """
+    stats = SearchStats('anytimeWeightedAStarSearch')
+    problem._searchStats = stats
+    evaluate = stats.timedHeuristic(heuristic)
+    startTime = time.perf_counter()
+    deadline = None if timeBudget is None else startTime + timeBudget
+
+    hValues = {}
+    def h(state):
+        if state not in hValues:
+            hValues[state] = evaluate(state, problem)
+        return hValues[state]
+
+    start = problem.getStartState()
+    g = {start: 0}
+    parents = {start: None}   # state -> (parent state, action, step cost)
+    closed, incons = set(), set()
+    goals = set()             # goal states expanded so far
+    fringe = []
+    count = 0
+    solution = [None, float('inf')] # goal state, cost
+    solutions = []
+    problem._anytimeSolutions = solutions
+
+    def push(state, w):
+        nonlocal count
+        heapq.heappush(fringe, (g[state] + w * h(state), count, g[state], state))
+        count += 1
+        stats.pushed += 1
+        stats.peakFringe = max(stats.peakFringe, len(fringe))
+
+    def improvePath(w, mayStop):
+        "One round of weighted A*; returns False if the deadline cut it short"
+        while fringe and fringe[0][0] < solution[1]:
+            if mayStop and deadline is not None and time.perf_counter() > deadline:
+                return False
+            _, _, cost, state = heapq.heappop(fringe)
+            stats.popped += 1
+            if cost != g[state] or state in closed:
+                stats.duplicatesSkipped += 1
+                continue
+            closed.add(state)
+            if problem.isGoalState(state):
+                goals.add(state)
+                solution[0], solution[1] = state, cost
+                continue
+            for child, action, stepCost in problem.getSuccessors(state):
+                newCost = cost + stepCost
+                if newCost < g.get(child, float('inf')):
+                    g[child] = newCost
+                    parents[child] = (state, action, stepCost)
+                    if child in closed:
+                        incons.add(child)
+                        # A closed goal is not popped again this round, so
+                        # take its cheaper path (now in parents) right away
+                        if child in goals and newCost < solution[1]:
+                            solution[0], solution[1] = child, newCost
+                    else:
+                        push(child, w)
+        return True
+
+    def getSolution():
+        """
+        The path to the solution's goal and its cost, which is lowered to
+        match: a state on the path may have been reached more cheaply since
+        the goal was expanded, and the parents already lead that way
+        """
+        state, path, cost = solution[0], [], 0
+        while parents[state] is not None:
+            state, action, stepCost = parents[state]
+            path.append(action)
+            cost += stepCost
+        path.reverse()
+        solution[1] = min(solution[1], cost)
+        return path
+
+    def bound(w):
+        "min(w, cost / lowest g + h of any state that may still improve it)"
+        pending = set(entry[3] for entry in fringe if entry[2] == g[entry[3]] and entry[3] not in closed)
+        pending |= incons
+        if not pending:
+            return 1.0
+        lowest = min(g[state] + h(state) for state in pending)
+        return min(w, solution[1] / lowest) if lowest > 0 else w
+
+    w = max(1.0, weight)
+    push(start, w)
+    finished = improvePath(w, False)
+    while solution[0] is not None:
+        path = getSolution()
+        if not solutions or solution[1] < solutions[-1][0]:
+            if finished:
+                epsilon = max(1.0, bound(w))
+            else:
+                # The fringe of an unfinished round proves nothing, but the
+                # new path is cheaper than the last one, whose bound holds
+                epsilon = max(1.0, solutions[-1][1] * solution[1] / solutions[-1][0])
+            solutions.append((solution[1], epsilon, time.perf_counter() - startTime))
+            if onSolution is not None:
+                onSolution(path, solution[1], epsilon)
+        if w <= 1.0 or not finished or (deadline is not None and time.perf_counter() > deadline):
+            break
+        # Next round: lower the weight and re-key every state still open
+        w = max(1.0, w - weightStep)
+        pending = set(entry[3] for entry in fringe if entry[2] == g[entry[3]] and entry[3] not in closed)
+        pending |= incons
+        fringe[:] = []
+        incons.clear()
+        closed.clear()
+        for state in pending:
+            push(state, w)
+        finished = improvePath(w, True)
+
+    stats.wallTime = time.perf_counter() - startTime
+    stats.expanded = getattr(problem, '_expanded', None)
+    if solution[0] is None:
+        return None
+    path = getSolution()
+    stats.pathLength = len(path)
+    return path
 
 
 # Abbreviations
@@ -183,3 +898,9 @@ bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+bidi = bidirectionalSearch
+ida = iterativeDeepeningAStarSearch
+idatt = idaStarTableSearch
+dfbnb = depthFirstBranchAndBound
+jps = jumpPointSearch
+ara = anytimeWeightedAStarSearch
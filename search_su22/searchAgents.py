@@ -38,10 +38,12 @@ from typing import List, Tuple, Any
 from game import Directions
 from game import Agent
 from game import Actions
+from game import Grid
 import util
 import time
 import search
 import pacman
+import distanceCalculator
 from itertools import combinations
 
 class GoWestAgent(Agent):
@@ -71,21 +73,46 @@ class SearchAgent(Agent):
     Options for fn include:
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
+      bidirectionalSearch or bidi (PositionSearchProblem only)
+      iterativeDeepeningAStarSearch or ida
+      idaStarTableSearch or idatt (IDA* with a bounded transposition table)
+      depthFirstBranchAndBound or dfbnb
+      jumpPointSearch or jps (unit cost PositionSearchProblem only)
+      anytimeWeightedAStarSearch or ara (e.g. -a fn=ara,weight=3,timeBudget=5)
 
+    Any other options are passed on to the search function as keyword
+    arguments, e.g. -a fn=ucs,prune=True or -a fn=idatt,tableSize=1000.
+
+    statsFile=<path> appends the SearchStats of every search (see search.py)
+    to that file as one line of JSON.
 
     Note: You should NOT change any code in SearchAgent
     """
+    statsFile = None # Subclasses that set up their own searchFunction skip __init__
+    statsFields = {}
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', statsFile=None, **options):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
+        self.statsFile = statsFile
+        self.statsFields = {'fn': fn, 'problem': prob}
 
         # Get the search function from the name and heuristic
         if fn not in dir(search):
             raise AttributeError(fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
+
+        # Extra keyword options, only passed on to search functions that take them
+        arguments = func.__code__.co_varnames[:func.__code__.co_argcount]
+        for name in options:
+            if name not in arguments:
+                raise AttributeError(fn + ' does not take a ' + name + ' option.')
+        options = dict((name, parseOption(value)) for name, value in options.items())
+        if options:
+            print('[SearchAgent] using options %s' % options)
+
         if 'heuristic' not in func.__code__.co_varnames:
             print('[SearchAgent] using function ' + fn)
-            self.searchFunction = func
+            self.searchFunction = lambda x: func(x, **options)
         else:
             if heuristic in globals().keys():
                 heur = globals()[heuristic]
@@ -94,8 +121,9 @@ class SearchAgent(Agent):
             else:
                 raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
+            self.statsFields['heuristic'] = heuristic
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.searchFunction = lambda x: func(x, heuristic=heur, **options)
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
@@ -121,6 +149,22 @@ class SearchAgent(Agent):
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if '_searchMemory' in dir(problem):
+            print('Peak memory: %(peakDepth)d nodes on the path, %(tableEntries)d table entries (%(iterations)d iterations)' % problem._searchMemory)
+        if '_anytimeSolutions' in dir(problem):
+            for cost, bound, seconds in problem._anytimeSolutions:
+                print('Anytime path of cost %d (at most %.3f x optimal) after %.2f seconds' % (cost, bound, seconds))
+        if '_pushesAvoided' in dir(problem):
+            print('Pushes avoided: %(closed)d already closed, %(bestCost)d no cheaper than best known' % problem._pushesAvoided)
+        if '_searchStats' in dir(problem):
+            stats = problem._searchStats
+            print('Fringe: %d pushed, %d popped, %d duplicates skipped, peak size %d' % (stats.pushed, stats.popped, stats.duplicatesSkipped, stats.peakFringe))
+            if stats.heuristicCalls:
+                print('Heuristic: %d calls in %.3f seconds' % (stats.heuristicCalls, stats.heuristicTime))
+            if stats.memoHits or stats.memoMisses:
+                print('Heuristic memo: %d hits, %d misses' % (stats.memoHits, stats.memoMisses))
+            if self.statsFile:
+                stats.writeJSONLine(self.statsFile, pathCost=totalCost, **self.statsFields)
 
     def getAction(self, state):
         """
@@ -138,6 +182,19 @@ class SearchAgent(Agent):
         else:
             return Directions.STOP
 
+def parseOption(value):
+    "Agent arguments arrive as strings from the command line; converts numbers and booleans"
+    if not isinstance(value, str):
+        return value
+    if value.lower() in ['true', 'false']:
+        return value.lower() == 'true'
+    for convert in [int, float]:
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
 class PositionSearchProblem(search.SearchProblem):
     """
     A search problem defines the state space, start state, goal test, successor
@@ -172,6 +229,9 @@ class PositionSearchProblem(search.SearchProblem):
     def getStartState(self):
         return self.startState
 
+    def getGoalState(self):
+        return self.goal
+
     def isGoalState(self, state):
         isGoal = state == self.goal
 
@@ -215,6 +275,30 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def getPredecessors(self, state):
+        """
+        Returns the states that reach 'state' in one move, as (predecessor,
+        action, stepCost) triples where 'action' leads from the predecessor to
+        'state'.  Moves on the grid are reversible, so these are just the open
+        neighbours.  Used by search.bidirectionalSearch.
+        """
+
+        predecessors = []
+        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+            x,y = state
+            dx, dy = Actions.directionToVector(action)
+            prevx, prevy = int(x - dx), int(y - dy)
+            if not self.walls[prevx][prevy]:
+                predecessors.append( ( (prevx, prevy), action, self.costFn(state)) )
+
+        # Bookkeeping for display purposes
+        self._expanded += 1
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return predecessors
+
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions. If those actions
@@ -271,20 +355,15 @@ def euclideanHeuristic(position, problem, info={}):
 # This portion is incomplete.  Time to write code!  #
 #####################################################
 
-class state_corner :
-    def __init__(self, gamestate, cornered):
-        self.pac_state = gamestate
-        self.is_cornered = cornered.copy()
-        '''
-        for corner in corners :
-            self.is_cornered[corner] = False
-        '''
-
 class CornersProblem(search.SearchProblem):
     """
     This search problem finds paths through all four corners of a layout.
-    state : (x,y) , dict{corners : False}
-    You must select a suitable state space and successor function
+
+    A search state is a single int, cell * 16 + visited, where cell numbers
+    Pacman's position as in the layout's DistanceTable (see
+    distanceCalculator.py) and bit i of visited is set once self.corners[i]
+    has been reached.  Use getPosition(state) and getVisited(state) to take
+    a state apart.
     """
 
     def __init__(self, startingGameState: pacman.GameState):
@@ -299,34 +378,79 @@ class CornersProblem(search.SearchProblem):
             if not startingGameState.hasFood(*corner):
                 print('Warning: no food in corner ' + str(corner))
         self._expanded = 0 # DO NOT CHANGE; Number of search nodes expanded
-        # Please add any code here which you would like to use
-        # in initializing the problem
-        self.is_cornered = dict()
-        for corner in self.corners :
-            self.is_cornered[corner] = False
+
+        self.table = distanceCalculator.getDistanceTable(self.walls)
+        self.cornerBit = dict((corner, 1 << i) for i, corner in enumerate(self.corners))
+        # (next cell, action, corner bit) for every legal move from each cell
+        self.moves = []
+        for cell in self.table.cells:
+            moves = []
+            for other in self.table.neighbors[self.table.index[cell]]:
+                position = self.table.cells[other]
+                action = Actions.vectorToDirection((position[0] - cell[0], position[1] - cell[1]))
+                moves.append((other, action, self.cornerBit.get(position, 0)))
+            self.moves.append(moves)
+        self.heuristicTable = self.cornersDistanceTable()
+
+    def cornersDistanceTable(self):
+        """
+        Returns the exact cost to finish from every state, indexed by state.
+
+        tour[visited][i] is the shortest walk that starts at corner i and
+        reaches every corner not in visited (a Held-Karp table over the 16
+        masks).  From a cell, the rest of the problem is the walk to the
+        first remaining corner plus its tour.  Corners that cannot be
+        reached make the problem unsolvable and get UNSOLVABLE.
+        """
+        reachable = [corner in self.table.index for corner in self.corners]
+        cornerRows = [self.table.getRow(corner) if ok else None for corner, ok in zip(self.corners, reachable)]
+        def between(i, j):
+            if not (reachable[i] and reachable[j]): return UNSOLVABLE
+            distance = int(cornerRows[i][self.table.index[self.corners[j]]])
+            return UNSOLVABLE if distance == distanceCalculator.UNREACHABLE else distance
+
+        full = (1 << len(self.corners)) - 1
+        tour = [[UNSOLVABLE] * len(self.corners) for visited in range(full + 1)]
+        for visited in range(full, -1, -1):
+            for i in range(len(self.corners)):
+                if visited == full:
+                    tour[visited][i] = 0
+                    continue
+                tour[visited][i] = min([between(i, j) + tour[visited | 1 << j][j]
+                                        for j in range(len(self.corners)) if not visited & 1 << j])
+
+        costs = [UNSOLVABLE] * (self.table.size << 4)
+        for cell in range(self.table.size):
+            toCorner = [int(row[cell]) if row is not None and row[cell] != distanceCalculator.UNREACHABLE
+                        else UNSOLVABLE for row in cornerRows]
+            for visited in range(full + 1):
+                if visited == full:
+                    costs[cell << 4 | visited] = 0
+                    continue
+                costs[cell << 4 | visited] = min(UNSOLVABLE, min([toCorner[j] + tour[visited | 1 << j][j]
+                    for j in range(len(self.corners)) if not visited & 1 << j]))
+        return costs
+
+    def getPosition(self, state):
+        "Pacman's (x, y) position in 'state'"
+        return self.table.cells[state >> 4]
+
+    def getVisited(self, state):
+        "The corners already reached in 'state'"
+        return [corner for i, corner in enumerate(self.corners) if state & 1 << i]
 
     def getStartState(self):
         """
         Returns the start state (in your state space, not the full Pacman state
         space)
         """
-        # temp = (self.startingPosition, False, False, False, False)
-        tf_sts = [False, False, False, False]
-        for i in range(len(self.corners)) :
-            if self.startingPosition == self.corners[i] :
-                list[i] = True
-        return (self.startingPosition, tf_sts[0], tf_sts[1], tf_sts[2], tf_sts[3])
-        #util.raiseNotDefined()
+        return self.table.index[self.startingPosition] << 4 | self.cornerBit.get(self.startingPosition, 0)
 
     def isGoalState(self, state: Any):
         """
         Returns whether this search state is a goal state of the problem.
         """
-        for elem in state[1:] :
-            if elem == False :
-                return False
-        return True
-        #util.raiseNotDefined()
+        return state & 15 == 15
 
     def getSuccessors(self, state: Any):
         """
@@ -338,24 +462,9 @@ class CornersProblem(search.SearchProblem):
             state, 'action' is the action required to get there, and 'stepCost'
             is the incremental cost of expanding to that successor
         """
-
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            # Add a successor state to the successor list if the action is legal
-            # Here's a code snippet for figuring out whether a new position hits a wall:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                # temp = ((nextx, nexty), 
-                tf_sts = [state[1], state[2], state[3], state[4]]
-                cost = 1
-                for i in range(len(self.corners)):
-                    if (nextx, nexty) == self.corners[i] :
-                        tf_sts[i] = True
-                successors.append((((nextx, nexty),tf_sts[0], tf_sts[1], tf_sts[2], tf_sts[3]), action, cost))
+        visited = state & 15
+        successors = [(other << 4 | visited | bit, action, 1) for other, action, bit in self.moves[state >> 4]]
         self._expanded += 1 # DO NOT CHANGE
-        # print(len(successors))
         return successors
 
     def getCostOfActions(self, actions):
@@ -371,6 +480,7 @@ class CornersProblem(search.SearchProblem):
             if self.walls[x][y]: return 999999
         return len(actions)
 
+UNSOLVABLE = 999999 # cornersHeuristic's value where some corner cannot be reached
 
 def cornersHeuristic(state: Any, problem: CornersProblem):
     """
@@ -384,48 +494,12 @@ def cornersHeuristic(state: Any, problem: CornersProblem):
     This function should always return a number that is a lower bound on the
     shortest path from the state to a goal of the problem; i.e.  it should be
     admissible (as well as consistent).
-    """
 
-    corners = problem.corners # These are the corner coordinates
-    walls = problem.walls # These are the walls of the maze, as a Grid (game.py)
-    # manhattanDistance
-    ans = 0
-    top, right = walls.height, walls.width
-    current_pos = state[0]
-    target_pos = state[0]
-    switch_type = 0
-    for i in range(4):
-        if state[i+1] == False:
-            switch_type += 1
-    if switch_type == 4 :
-        list_dis = []
-        for corner in corners :
-            list_dis.append(util.manhattanDistance(corner, current_pos))
-        ans += min(list_dis)
-        ans += min(2*top + right - 9, 2*right + top - 9)
-    elif switch_type == 3:
-        if state[1] == False and state[4] == False :
-            ans += min(util.manhattanDistance(corners[0], current_pos), \
-                util.manhattanDistance(corners[3], current_pos))
-        else :
-            ans += min(util.manhattanDistance(corners[1], current_pos), \
-                util.manhattanDistance(corners[2], current_pos))
-        ans += top + right - 6
-    elif switch_type == 2:
-        target_corner = []
-        for i in range(4):
-            if state[i+1] == False:
-                target_corner.append(corners[i])
-        ans += min(util.manhattanDistance(current_pos, target_corner[0]), \
-            util.manhattanDistance(current_pos, target_corner[1]))
-        ans += util.manhattanDistance(target_corner[0], target_corner[1])
-    else : 
-        for i in range(4):
-            if state[i+1] == False:
-                target_pos = corners[i]
-                ans += util.manhattanDistance(current_pos, target_pos)
-                current_pos = target_pos
-    return ans # Default to trivial solution
+    The problem precomputes the exact remaining cost of every state from
+    maze distances (see CornersProblem.cornersDistanceTable), so this is a
+    lookup, and A* only expands states on a shortest path.
+    """
+    return problem.heuristicTable[state]
 
 class AStarCornersAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
@@ -438,36 +512,61 @@ class FoodSearchProblem:
     A search problem associated with finding the a path that collects all of the
     food (dots) in a Pacman game.
 
-    A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
+    A search state in this problem is a tuple ( pacmanPosition, foodBits ) where
       pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+      foodBits:       an int whose bit i is set while the dot self.foodCells[i] remains
+
+    States are immutable and hash in O(1), and a successor only clears one
+    bit instead of copying a Grid.  Use getFoodList(state) or
+    getFoodGrid(state) to see the remaining food as positions or as a Grid.
     """
     def __init__(self, startingGameState: pacman.GameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
         self.walls = startingGameState.getWalls()
+        self.foodCells = startingGameState.getFood().asList()
+        self.foodBit = dict((cell, 1 << i) for i, cell in enumerate(self.foodCells))
+        self.start = (startingGameState.getPacmanPosition(), (1 << len(self.foodCells)) - 1)
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
 
+        # (nextPosition, direction, foodBit) for every legal move from each cell
+        self.moves = {}
+        for x, y in self.walls.asList(False):
+            moves = []
+            for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(direction)
+                nextx, nexty = int(x + dx), int(y + dy)
+                if not self.walls[nextx][nexty]:
+                    moves.append( ((nextx, nexty), direction, self.foodBit.get((nextx, nexty), 0)) )
+            self.moves[(x, y)] = moves
+
     def getStartState(self):
         return self.start
 
     def isGoalState(self, state):
-        return state[1].count() == 0
+        return state[1] == 0
 
     def getSuccessors(self, state):
         "Returns successor states, the actions they require, and a cost of 1."
-        successors = []
         self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
-        return successors
+        food = state[1]
+        return [ ((nextPosition, food & ~bit), direction, 1) for nextPosition, direction, bit in self.moves[state[0]] ]
+
+    def getFoodCount(self, state):
+        "Number of dots left in a state"
+        return bin(state[1]).count('1')
+
+    def getFoodList(self, state):
+        "Positions of the dots left in a state, in Grid.asList() order"
+        food = state[1]
+        return [cell for i, cell in enumerate(self.foodCells) if food >> i & 1]
+
+    def getFoodGrid(self, state):
+        "The dots left in a state as a Grid of booleans, like pacman.GameState.getFood()"
+        grid = Grid(self.walls.width, self.walls.height, False)
+        for x, y in self.getFoodList(state):
+            grid[x][y] = True
+        return grid
 
     def getCostOfActions(self, actions):
         """Returns the cost of a particular sequence of actions.  If those actions
@@ -489,7 +588,7 @@ class AStarFoodSearchAgent(SearchAgent):
         self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
         self.searchType = FoodSearchProblem
 
-def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
+def foodHeuristic(state: Tuple[Tuple, int], problem: FoodSearchProblem):
     """
     Your heuristic for the FoodSearchProblem goes here.
 
@@ -502,9 +601,10 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     other hand, inadmissible or inconsistent heuristics may find optimal
     solutions, so be careful.
 
-    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
-    (see game.py) of either True or False. You can call foodGrid.asList() to get
-    a list of food coordinates instead.
+    The state is a tuple ( pacmanPosition, foodBits ) where foodBits is an int
+    bitmask of the remaining dots (see FoodSearchProblem).  You can call
+    problem.getFoodList(state) to get a list of food coordinates, or
+    problem.getFoodGrid(state) for a Grid (see game.py) of True or False.
 
     If you want access to info like walls, capsules, etc., you can query the
     problem.  For example, problem.walls gives you a Grid of where the walls
@@ -518,8 +618,60 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     problem.heuristicInfo['wallCount']
     """
 
-    position, foodGrid = state
-    food_seq = foodGrid.asList()
+    position, foodBits = state
+    if foodBits == 0:
+        return 0
+    foodList = problem.getFoodList(state)
+    table = distanceCalculator.getDistanceTable(problem.walls)
+    if len(foodList) <= problem.heuristicInfo.get('heldKarpLimit', 0):
+        return heldKarpFoodBound(position, foodList, table.getDistance)
+
+    # Any path that eats every dot first walks to some dot and then visits
+    # the rest, which costs at least a spanning tree over the food.
+    nearest = min([table.getDistance(position, food) for food in foodList])
+    return nearest + foodTreeCost(foodBits, foodList, table, problem.heuristicInfo)
+
+def foodTreeCost(foodBits, foodList, table, heuristicInfo):
+    """
+    Returns the cost of a minimum spanning tree over the food in foodList,
+    using the maze distances in 'table'.  Results are memoised by the food
+    bitmask in heuristicInfo['foodTreeCost'], since many search states share
+    the same remaining food.
+    """
+    cache = heuristicInfo.setdefault('foodTreeCost', {})
+    if foodBits not in cache:
+        cache[foodBits] = minimumSpanningTreeCost([table.index[food] for food in foodList], table)
+    return cache[foodBits]
+
+def minimumSpanningTreeCost(cells, table):
+    "Prim's algorithm over the complete graph of table distances, O(n^2)"
+    matrix, size = table.matrix, table.size
+    if len(cells) <= 1:
+        return 0
+    remaining = cells[1:]
+    start = cells[0] * size
+    best = [int(matrix[start + cell]) for cell in remaining]
+    total = 0
+    while remaining:
+        i = best.index(min(best))
+        total += best[i]
+        added = remaining[i] * size
+        remaining[i], best[i] = remaining[-1], best[-1]
+        remaining.pop()
+        best.pop()
+        for j, cell in enumerate(remaining):
+            d = int(matrix[added + cell])
+            if d < best[j]:
+                best[j] = d
+    return total
+
+def heldKarpFoodBound(position, food_seq, distance):
+    """
+    Exact length of the shortest path from position through every dot, by
+    the Held-Karp TSP DP in O(n^2 * 2^n).  Only worth it for a handful of
+    dots; foodHeuristic uses it when the number of remaining dots is at most
+    problem.heuristicInfo['heldKarpLimit'] (0 by default).
+    """
     n = len(food_seq) + 1
     C = [[float('inf') for _ in range(n)] for __ in range(1 << n)]
     C[1][0] = 0
@@ -533,31 +685,35 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
                     if j == i: continue
                     cur_index = k ^ (1 << i)
                     if j == 0 :
-                        C[k][i] = min(C[k][i], C[cur_index][j]+ util.manhattanDistance(position, food_seq[i-1]))
+                        C[k][i] = min(C[k][i], C[cur_index][j]+ distance(position, food_seq[i-1]))
                     else :   
-                        C[k][i] = min(C[k][i], C[cur_index][j]+ util.manhattanDistance(food_seq[j-1], food_seq[i-1]))   
+                        C[k][i] = min(C[k][i], C[cur_index][j]+ distance(food_seq[j-1], food_seq[i-1]))   
                                                #C[S−{i}][j]
     all_index = (1 << n) - 1
     return min([C[all_index][i] for i in range(n)])
-    # A TSP solution (DP version with O(n^2 * 2^n))
-    # Path found with total cost of 60 in 201.2 seconds
-    # Search nodes expanded: 6908
-    # Score 5/4 (optional extra credit)
-    '''
-    position, foodGrid = state
-
-    distances = [0]
-    for food in foodGrid.asList():
-        # distances.append(util.manhattanDistance(position, food))
-        distances.append(mazeDistance(position, food, problem.startingGameState))
-    distanceFurthest = max(distances)
-
-    return distanceFurthest
-    '''
+
 class ClosestDotSearchAgent(SearchAgent):
-    "Search for all food using a sequence of searches"
+    """
+    Search for all food using a sequence of searches.
+
+    With -a table=True each closest dot is instead read off the cached
+    all-pairs DistanceTable (see distanceCalculator.py).  With
+    -a incremental=True the agent keeps one NearestFoodField for the whole
+    run and follows it downhill, repairing it locally each time a dot is
+    eaten.  Both modes also head for a closest dot at every step, but when
+    several dots are equally close they may pick a different one than the
+    search does, so their tours (and lengths) can differ.
+    """
+    def __init__(self, incremental=False, table=False, **options):
+        SearchAgent.__init__(self, **options)
+        self.incremental = parseOption(incremental)
+        self.useTable = parseOption(table)
+
     def registerInitialState(self, state):
+        if getattr(self, 'incremental', False):
+            return self.registerIncrementally(state)
         self.actions = []
+        self._expanded = 0
         currentState = state
         while(currentState.getFood().count() > 0):
             nextPathSegment = self.findPathToClosestDot(currentState) # The missing piece
@@ -571,20 +727,66 @@ class ClosestDotSearchAgent(SearchAgent):
         self.actionIndex = 0
         print('Path found with cost %d.' % len(self.actions))
 
+    def registerIncrementally(self, state):
+        """
+        Plans a greedy closest dot tour on a single NearestFoodField.  Ties
+        between equally close dots are broken by the field rather than by
+        the search, so the tour may differ from the default mode's.
+        """
+        self.actions = []
+        field = distanceCalculator.NearestFoodField(state.getWalls(), state.getFood().asList())
+        position = state.getPacmanPosition()
+        while field.getDistance(position) != distanceCalculator.UNREACHABLE:
+            nextPosition = field.getNextStep(position)
+            if nextPosition is None:
+                field.removeFood(position)
+                continue
+            self.actions.append(Actions.vectorToDirection((nextPosition[0] - position[0], nextPosition[1] - position[1])))
+            position = nextPosition
+        self.actionIndex = 0
+        self._expanded = field.expanded
+        print('Path found with cost %d.' % len(self.actions))
+
     def findPathToClosestDot(self, gameState: pacman.GameState):
         """
         Returns a path (a list of actions) to the closest dot, starting from
         gameState.
         """
+        if getattr(self, 'useTable', False):
+            return self.findPathWithTable(gameState)
+
         # Here are some useful elements of the startState
         startPosition = gameState.getPacmanPosition()
         food = gameState.getFood()
         walls = gameState.getWalls()
         problem = AnyFoodSearchProblem(gameState)
 
-        return search.astar(problem)
+        path = search.astar(problem)
+        self._expanded = getattr(self, '_expanded', 0) + problem._expanded
+        return path
         # util.raiseNotDefined()
 
+    def findPathWithTable(self, gameState: pacman.GameState):
+        """
+        Returns a path to a closest dot read off the all-pairs DistanceTable,
+        which is built on first use.  Among equally close dots it takes the
+        smallest (x, y), which need not be the one the search reaches first.
+        """
+        startPosition = gameState.getPacmanPosition()
+        table = distanceCalculator.getDistanceTable(gameState.getWalls())
+        reachable = [(table.getDistance(startPosition, dot), dot) for dot in gameState.getFood().asList()
+                     if table.getDistance(startPosition, dot) != distanceCalculator.UNREACHABLE]
+        if not reachable:
+            return []
+        _, target = min(reachable)
+        path = []
+        position = startPosition
+        while position != target:
+            nextPosition = table.getNextStep(position, target)
+            path.append(Actions.vectorToDirection((nextPosition[0] - position[0], nextPosition[1] - position[1])))
+            position = nextPosition
+        return path
+
 class AnyFoodSearchProblem(PositionSearchProblem):
     """
     A search problem for finding a path to any food.
@@ -637,5 +839,4 @@ def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int], gameState: pa
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return distanceCalculator.getDistanceTable(walls).getDistance(point1, point2)
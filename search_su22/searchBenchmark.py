@@ -0,0 +1,244 @@
+# searchBenchmark.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A headless benchmark of the search algorithms in search.py on the search
+problems in searchAgents.py, over every layout in layouts/.
+
+Every (layout, problem, algorithm) run records the nodes expanded, the path
+cost and the wall time.  With --memory it also records the peak memory the
+run allocated, in kilobytes, as traced by tracemalloc; tracing slows the
+searches down, so wall times from such a report are not comparable with
+others.  Runs that expand more than --max-expanded nodes or take more than
+--max-seconds are stopped and recorded with status 'budget'.
+
+The report is written as JSON and/or CSV.  Given --baseline, an earlier
+JSON report, the runs are compared against it and any run that now expands
+more nodes, finds a costlier path, stops finishing or gets much slower is
+listed as a regression; the exit status is then 1.
+
+> python searchBenchmark.py --json report.json
+> python searchBenchmark.py -l tinyMaze,mediumMaze -a bfs,astar --baseline report.json
+"""
+
+import contextlib
+import csv
+import io
+import json
+import optparse
+import os
+import sys
+import time
+import tracemalloc
+import layout
+import pacman
+import search
+import searchAgents
+
+LAYOUT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layouts')
+
+# Problem name -> (constructor taking a GameState, heuristic for informed searches)
+PROBLEMS = {
+    'PositionSearchProblem': (lambda state: searchAgents.PositionSearchProblem(state, warn=False, visualize=False),
+                              searchAgents.manhattanHeuristic),
+    'CornersProblem': (searchAgents.CornersProblem, searchAgents.cornersHeuristic),
+    'FoodSearchProblem': (searchAgents.FoodSearchProblem, searchAgents.foodHeuristic),
+    'AnyFoodSearchProblem': (searchAgents.AnyFoodSearchProblem, search.nullHeuristic),
+}
+
+ALGORITHMS = ['dfs', 'bfs', 'ucs', 'astar', 'bidi', 'ida', 'idatt', 'dfbnb', 'jps', 'ara']
+
+FIELDS = ['layout', 'problem', 'algorithm', 'heuristic', 'status',
+          'expanded', 'pathCost', 'wallTime', 'peakKB']
+
+class BudgetExceeded(Exception):
+    pass
+
+def loadLayouts(names=None):
+    "Returns [(name, Layout)] for the named layouts, or every .lay in LAYOUT_DIRECTORY"
+    if names is None:
+        names = sorted(fileName[:-4] for fileName in os.listdir(LAYOUT_DIRECTORY) if fileName.endswith('.lay'))
+    layouts = []
+    for name in names:
+        lay = layout.tryToLoad(os.path.join(LAYOUT_DIRECTORY, name + '.lay'))
+        if lay is None:
+            raise Exception('The layout ' + name + ' cannot be found')
+        layouts.append((name, lay))
+    return layouts
+
+def isRelevant(problemName, algorithm, gameState):
+    "Skips runs that cannot be posed on this layout"
+    if algorithm in ['bidi', 'jps']:
+        return problemName == 'PositionSearchProblem'
+    if problemName in ['FoodSearchProblem', 'AnyFoodSearchProblem']:
+        return gameState.getNumFood() > 0
+    return True
+
+def limitExpansions(problem, maxExpanded, maxSeconds, timeoutError=BudgetExceeded):
+    """
+    Makes the search raise BudgetExceeded once it has expanded maxExpanded
+    nodes, or timeoutError once it has run for maxSeconds.  getSuccessors
+    and getPredecessors (which bidi expands through) are wrapped, and
+    problem._checkBudget is set for jumpPointSearch, which calls neither.
+    """
+    deadline = time.perf_counter() + maxSeconds
+    def checkBudget(work):
+        if work >= maxExpanded:
+            raise BudgetExceeded()
+        if time.perf_counter() > deadline:
+            raise timeoutError()
+    def limit(expand):
+        def limited(state):
+            checkBudget(problem._expanded)
+            return expand(state)
+        return limited
+    problem.getSuccessors = limit(problem.getSuccessors)
+    if hasattr(problem, 'getPredecessors'):
+        problem.getPredecessors = limit(problem.getPredecessors)
+    problem._checkBudget = checkBudget
+
+def runOne(layoutName, lay, problemName, algorithm, maxExpanded, maxSeconds, memory=False):
+    "Runs one search and returns its report row as a dict"
+    makeProblem, heuristic = PROBLEMS[problemName]
+    func = getattr(search, algorithm)
+    informed = 'heuristic' in func.__code__.co_varnames
+    row = {'layout': layoutName, 'problem': problemName, 'algorithm': algorithm,
+           'heuristic': heuristic.__name__ if informed else '',
+           'status': 'ok', 'expanded': None, 'pathCost': None}
+    gameState = pacman.GameState()
+    gameState.initialize(lay, 0)
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    # The problems print warnings about unusual layouts; keep the report clean
+    problem = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            problem = makeProblem(gameState)
+            limitExpansions(problem, maxExpanded, maxSeconds)
+            path = func(problem, heuristic=heuristic) if informed else func(problem)
+            if path is None:
+                row['status'] = 'nopath'
+            else:
+                row['pathCost'] = problem.getCostOfActions(path)
+        except BudgetExceeded:
+            row['status'] = 'budget'
+        except Exception as e:
+            row['status'] = 'error: %r' % e
+    row['wallTime'] = round(time.perf_counter() - start, 6)
+    row['expanded'] = getattr(problem, '_expanded', None)
+    row['peakKB'] = None
+    if memory:
+        row['peakKB'] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    return row
+
+def runBenchmark(layoutNames=None, problemNames=None, algorithms=None,
+                 maxExpanded=200000, maxSeconds=10.0, verbose=True, memory=False):
+    "Returns the report rows for every relevant (layout, problem, algorithm)"
+    problemNames = problemNames or sorted(PROBLEMS)
+    algorithms = algorithms or ALGORITHMS
+    rows = []
+    for layoutName, lay in loadLayouts(layoutNames):
+        gameState = pacman.GameState()
+        gameState.initialize(lay, 0)
+        for problemName in problemNames:
+            for algorithm in algorithms:
+                if not isRelevant(problemName, algorithm, gameState):
+                    continue
+                row = runOne(layoutName, lay, problemName, algorithm, maxExpanded, maxSeconds, memory)
+                rows.append(row)
+                if verbose:
+                    print('%-18s %-22s %-6s %-7s expanded %-8s cost %-6s %.3fs' % (
+                        layoutName, problemName, algorithm, row['status'], row['expanded'],
+                        row['pathCost'], row['wallTime']))
+    return rows
+
+def rowKey(row):
+    return (row['layout'], row['problem'], row['algorithm'], row['heuristic'])
+
+def compareToBaseline(rows, baseline, timeRatio=1.5, timeSlack=0.05):
+    """
+    Returns a list of messages, one per run that regressed against the
+    baseline rows.  Wall times only count as regressions when they are both
+    timeRatio times and timeSlack seconds slower, to ride out timer noise.
+    """
+    previous = dict((rowKey(row), row) for row in baseline)
+    regressions = []
+    for row in rows:
+        old = previous.get(rowKey(row))
+        if old is None:
+            continue
+        name = '%s %s %s' % rowKey(row)[:3]
+        if old['status'] == 'ok' and row['status'] != 'ok':
+            regressions.append('%s: now %s' % (name, row['status']))
+            continue
+        if row['status'] != 'ok' or old['status'] != 'ok':
+            continue
+        if row['pathCost'] > old['pathCost']:
+            regressions.append('%s: path cost %s -> %s' % (name, old['pathCost'], row['pathCost']))
+        if row['expanded'] > old['expanded']:
+            regressions.append('%s: expanded %s -> %s' % (name, old['expanded'], row['expanded']))
+        if row['wallTime'] > old['wallTime'] * timeRatio and row['wallTime'] - old['wallTime'] > timeSlack:
+            regressions.append('%s: wall time %.3fs -> %.3fs' % (name, old['wallTime'], row['wallTime']))
+    return regressions
+
+def writeJSON(rows, fileName):
+    with open(fileName, 'w') as f:
+        json.dump(rows, f, indent=1, sort_keys=True)
+
+def writeCSV(rows, fileName):
+    with open(fileName, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def splitOption(value):
+    return value.split(',') if value else None
+
+if __name__ == '__main__':
+    parser = optparse.OptionParser('python searchBenchmark.py [options]')
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='comma separated layout names (default: every layout)')
+    parser.add_option('-p', '--problems', dest='problems', default=None,
+                      help='comma separated problem classes (default: %s)' % ','.join(sorted(PROBLEMS)))
+    parser.add_option('-a', '--algorithms', dest='algorithms', default=None,
+                      help='comma separated search functions (default: %s)' % ','.join(ALGORITHMS))
+    parser.add_option('--max-expanded', dest='maxExpanded', type='int', default=200000,
+                      help='stop a run after this many expansions (default %default)')
+    parser.add_option('--max-seconds', dest='maxSeconds', type='float', default=10.0,
+                      help='stop a run after this many seconds (default %default)')
+    parser.add_option('--memory', dest='memory', action='store_true', default=False,
+                      help='record the peak memory each run allocates (slows the runs)')
+    parser.add_option('--json', dest='json', default=None, help='write the report as JSON')
+    parser.add_option('--csv', dest='csv', default=None, help='write the report as CSV')
+    parser.add_option('--baseline', dest='baseline', default=None,
+                      help='a JSON report to check this run against for regressions')
+    options, _ = parser.parse_args()
+
+    rows = runBenchmark(splitOption(options.layouts), splitOption(options.problems),
+                        splitOption(options.algorithms), options.maxExpanded, options.maxSeconds,
+                        memory=options.memory)
+    if options.json:
+        writeJSON(rows, options.json)
+    if options.csv:
+        writeCSV(rows, options.csv)
+    if options.baseline:
+        with open(options.baseline) as f:
+            regressions = compareToBaseline(rows, json.load(f))
+        print('%d regression(s) against %s' % (len(regressions), options.baseline))
+        for message in regressions:
+            print('  ' + message)
+        if regressions:
+            sys.exit(1)
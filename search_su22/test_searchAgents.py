@@ -0,0 +1,120 @@
+# test_searchAgents.py
+# --------------------
+# Checks cornersHeuristic and foodHeuristic against the exact cost to the
+# goal from every reachable state of small layouts, and against the
+# Manhattan corners bound they replaced.
+
+from collections import deque
+import unittest
+
+import layout
+import pacman
+import search
+import searchAgents
+import util
+
+
+def loadGameState(name):
+    gameState = pacman.GameState()
+    gameState.initialize(layout.getLayout(name), 0)
+    return gameState
+
+
+def exactCostsToGo(problem):
+    """
+    The cost of a shortest path to a goal from every state reachable from
+    the start, found by a backwards breadth first search from the goals
+    (every step costs 1 in these problems).  States that cannot reach a
+    goal are left out.
+    """
+    start = problem.getStartState()
+    predecessors = {start: []}
+    frontier = [start]
+    for state in frontier:
+        for successor, _, cost in problem.getSuccessors(state):
+            assert cost == 1
+            if successor not in predecessors:
+                predecessors[successor] = []
+                frontier.append(successor)
+            predecessors[successor].append(state)
+    costs = dict((state, 0) for state in predecessors if problem.isGoalState(state))
+    queue = deque(costs)
+    while queue:
+        state = queue.popleft()
+        for predecessor in predecessors[state]:
+            if predecessor not in costs:
+                costs[predecessor] = costs[state] + 1
+                queue.append(predecessor)
+    return costs
+
+
+def manhattanCornersBound(position, unvisited, corners, walls):
+    "cornersHeuristic before it became a table lookup, on (position, unvisited corners)"
+    top, right = walls.height, walls.width
+    if len(unvisited) == 4:
+        return (min([util.manhattanDistance(corner, position) for corner in corners]) +
+                min(2 * top + right - 9, 2 * right + top - 9))
+    if len(unvisited) == 3:
+        if corners[0] in unvisited and corners[3] in unvisited:
+            near = min(util.manhattanDistance(corners[0], position), util.manhattanDistance(corners[3], position))
+        else:
+            near = min(util.manhattanDistance(corners[1], position), util.manhattanDistance(corners[2], position))
+        return near + top + right - 6
+    if len(unvisited) == 2:
+        return (min(util.manhattanDistance(position, unvisited[0]), util.manhattanDistance(position, unvisited[1])) +
+                util.manhattanDistance(unvisited[0], unvisited[1]))
+    total = 0
+    for corner in unvisited:
+        total += util.manhattanDistance(position, corner)
+        position = corner
+    return total
+
+
+class CornersHeuristicTest(unittest.TestCase):
+
+    def testIsTheExactCostToGo(self):
+        for name in ['tinyCorners', 'mediumCorners']:
+            problem = searchAgents.CornersProblem(loadGameState(name))
+            for state, cost in exactCostsToGo(problem).items():
+                self.assertEqual(searchAgents.cornersHeuristic(state, problem), cost, (name, state))
+
+    def testNeverBelowTheManhattanBound(self):
+        for name in ['tinyCorners', 'mediumCorners']:
+            problem = searchAgents.CornersProblem(loadGameState(name))
+            for state in exactCostsToGo(problem):
+                visited = problem.getVisited(state)
+                unvisited = [corner for corner in problem.corners if corner not in visited]
+                old = manhattanCornersBound(problem.getPosition(state), unvisited, problem.corners, problem.walls)
+                self.assertGreaterEqual(searchAgents.cornersHeuristic(state, problem), old, (name, state))
+
+
+class FoodHeuristicTest(unittest.TestCase):
+
+    def testAdmissibleAndConsistent(self):
+        for name in ['testSearch', 'tinySearch', 'trickySearch']:
+            problem = searchAgents.FoodSearchProblem(loadGameState(name))
+            costs = exactCostsToGo(problem)
+            for state, cost in costs.items():
+                value = searchAgents.foodHeuristic(state, problem)
+                self.assertLessEqual(value, cost, (name, state))
+                for successor, _, stepCost in problem.getSuccessors(state):
+                    self.assertLessEqual(value, stepCost + searchAgents.foodHeuristic(successor, problem),
+                                         (name, state, successor))
+
+    def testHeldKarpIsTheExactCostToGo(self):
+        for name in ['testSearch', 'tinySearch']:
+            problem = searchAgents.FoodSearchProblem(loadGameState(name))
+            problem.heuristicInfo['heldKarpLimit'] = len(problem.foodCells)
+            for state, cost in exactCostsToGo(problem).items():
+                self.assertEqual(searchAgents.foodHeuristic(state, problem), cost, (name, state))
+
+    def testAStarMatchesUniformCostSearch(self):
+        for name in ['testSearch', 'tinySearch', 'trickySearch']:
+            problem = searchAgents.FoodSearchProblem(loadGameState(name))
+            optimal = len(search.ucs(problem))
+            problem = searchAgents.FoodSearchProblem(loadGameState(name))
+            self.assertEqual(len(search.astar(problem, searchAgents.foodHeuristic)), optimal, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
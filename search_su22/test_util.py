@@ -0,0 +1,166 @@
+# test_util.py
+# ------------
+# Differential tests for util.PriorityQueue.  The indexed queue must hand
+# out items in the same order as the original list-scan implementation,
+# which is kept below as the reference.
+
+import heapq
+import importlib.util
+import os
+import random
+import unittest
+
+import util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COPIES = ['search_su22', 'multiagent', 'reinforcement', 'Bayes_inference']
+
+
+class ListScanPriorityQueue:
+    "util.PriorityQueue as it was before update() was indexed"
+    def __init__(self):
+        self.heap = []
+        self.count = 0
+
+    def push(self, item, priority):
+        entry = (priority, self.count, item)
+        heapq.heappush(self.heap, entry)
+        self.count += 1
+
+    def pop(self):
+        (_, _, item) = heapq.heappop(self.heap)
+        return item
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def update(self, item, priority):
+        for index, (p, c, i) in enumerate(self.heap):
+            if i == item:
+                if p <= priority:
+                    break
+                del self.heap[index]
+                self.heap.append((priority, c, item))
+                heapq.heapify(self.heap)
+                break
+        else:
+            self.push(item, priority)
+
+
+class LowestEntryPriorityQueue(ListScanPriorityQueue):
+    """
+    The list-scan queue, but update() picks the lowest (priority, push order)
+    entry of a duplicated item rather than whichever sits first in the heap.
+    """
+    def update(self, item, priority):
+        matches = [index for index, (p, c, i) in enumerate(self.heap) if i == item]
+        if not matches:
+            self.push(item, priority)
+            return
+        index = min(matches, key=lambda index: self.heap[index][:2])
+        p, c, _ = self.heap[index]
+        if p <= priority:
+            return
+        del self.heap[index]
+        self.heap.append((priority, c, item))
+        heapq.heapify(self.heap)
+
+
+def loadQueueClasses():
+    "PriorityQueue from each project's copy of util.py"
+    classes = []
+    for project in COPIES:
+        path = os.path.join(ROOT, project, 'util.py')
+        spec = importlib.util.spec_from_file_location(project + '_util', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        classes.append((project, module.PriorityQueue))
+    return classes
+
+
+def replay(queue, trace):
+    "Runs a trace of operations and returns everything pop() handed out"
+    popped = []
+    for op, item, priority in trace:
+        if op == 'push':
+            queue.push(item, priority)
+        elif op == 'update':
+            queue.update(item, priority)
+        elif not queue.isEmpty():
+            popped.append(queue.pop())
+    while not queue.isEmpty():
+        popped.append(queue.pop())
+    return popped
+
+
+def randomTrace(rng, length, items, duplicatePushes, key=lambda item: item):
+    """
+    A random mix of push/update/pop.  Without duplicatePushes an item is only
+    pushed when it is not already queued, which is how the searches use the
+    queue and where the list scan's choice of entry is unambiguous.
+    """
+    trace = []
+    queued = {}
+    for _ in range(length):
+        roll = rng.random()
+        item = rng.choice(items)
+        priority = rng.randint(0, 20)
+        if roll < 0.3 and (duplicatePushes or not queued.get(key(item))):
+            trace.append(('push', item, priority))
+            queued[key(item)] = queued.get(key(item), 0) + 1
+        elif roll < 0.7:
+            trace.append(('update', item, priority))
+            queued.setdefault(key(item), 1)
+        else:
+            trace.append(('pop', None, None))
+    return trace
+
+
+class PriorityQueueTest(unittest.TestCase):
+
+    def testPopAfterDuplicatePushKeepsUpdateANoOp(self):
+        queue = util.PriorityQueue()
+        queue.update('b', 0)
+        queue.push('a', 1)
+        queue.push('a', 5)
+        self.assertEqual(queue.pop(), 'b')
+        self.assertEqual(queue.pop(), 'a')
+        queue.update('a', 7)
+        self.assertEqual(replay(queue, []), ['a'])
+
+    def testUpdateLowersTheRemainingDuplicate(self):
+        queue = util.PriorityQueue()
+        queue.update('c', 3)
+        queue.push('a', 1)
+        queue.push('a', 5)
+        self.assertEqual(queue.pop(), 'a')
+        queue.update('a', 2)
+        self.assertEqual(replay(queue, []), ['a', 'c'])
+
+    def testMatchesListScanWithoutDuplicatePushes(self):
+        for project, PriorityQueue in loadQueueClasses():
+            rng = random.Random(project)
+            for _ in range(200):
+                trace = randomTrace(rng, 120, 'abcdefghij', False)
+                self.assertEqual(replay(PriorityQueue(), trace),
+                                 replay(ListScanPriorityQueue(), trace), project)
+
+    def testMatchesLowestEntryScanWithDuplicatePushes(self):
+        for project, PriorityQueue in loadQueueClasses():
+            rng = random.Random(project)
+            for _ in range(200):
+                trace = randomTrace(rng, 120, 'abcdef', True)
+                self.assertEqual(replay(PriorityQueue(), trace),
+                                 replay(LowestEntryPriorityQueue(), trace), project)
+
+    def testUnhashableItems(self):
+        rng = random.Random(0)
+        items = [[x, y] for x in range(3) for y in range(2)]
+        for _ in range(100):
+            trace = randomTrace(rng, 80, items, True, key=tuple)
+            self.assertEqual(replay(util.PriorityQueue(), trace),
+                             replay(LowestEntryPriorityQueue(), trace))
+
+
+if __name__ == '__main__':
+    unittest.main()